@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from array import array
+from collections import deque
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,10 +24,91 @@ class Achievement:
     timestamp: datetime
     metadata: Dict = None
 
+# Solar Cleaner: a reading at least 20% above another within the last 48 hours
+SOLAR_WINDOW = timedelta(hours=48)
+SOLAR_IMPROVEMENT = 1.2
+SOLAR_RETENTION = timedelta(days=30)  # how long readings are kept at all
+
+class SolarReadingHistory:
+    """One profile's solar readings, evaluated as they stream in.
+
+    Readings from the last 48 hours sit in a time-ordered deque. A second
+    deque keeps the window's readings with increasing efficiency, so its
+    front is always the window minimum and each reading costs O(1) amortized.
+    Readings leaving the window are archived as (timestamp, efficiency)
+    arrays and dropped once they are older than ``retention``.
+    """
+
+    def __init__(self, window: timedelta = SOLAR_WINDOW, retention: timedelta = SOLAR_RETENTION):
+        self.window = window
+        self.retention = retention
+        self.recent: Deque[Dict] = deque()
+        self.minimums: Deque[Tuple[datetime, float]] = deque()
+        self.archive_times = array("d")
+        self.archive_efficiency = array("d")
+        self.archive_start = 0
+
+    def __len__(self) -> int:
+        return len(self.recent) + len(self.archive_times) - self.archive_start
+
+    def add(self, reading: Dict) -> Optional[Dict]:
+        """Record a reading; returns the improvement if it beats the window minimum by 20%."""
+        now = reading["timestamp"]
+        if self.recent and now < self.recent[-1]["timestamp"]:
+            raise ValueError("Solar readings must be recorded in time order")
+        efficiency = reading["efficiency"]
+
+        cutoff = now - self.window
+        while self.recent and self.recent[0]["timestamp"] < cutoff:
+            old = self.recent.popleft()
+            self.archive_times.append(old["timestamp"].timestamp())
+            self.archive_efficiency.append(old["efficiency"])
+        while self.minimums and self.minimums[0][0] < cutoff:
+            self.minimums.popleft()
+        self._evict_archive((now - self.retention).timestamp())
+
+        improvement = None
+        if self.minimums and efficiency > self.minimums[0][1] * SOLAR_IMPROVEMENT:
+            then, lowest = self.minimums[0]
+            improvement = {"improvement": efficiency - lowest, "time_taken": str(now - then)}
+
+        while self.minimums and self.minimums[-1][1] >= efficiency:
+            self.minimums.pop()
+        self.minimums.append((now, efficiency))
+        self.recent.append(reading)
+        return improvement
+
+    def _evict_archive(self, cutoff: float):
+        times = self.archive_times
+        while self.archive_start < len(times) and times[self.archive_start] < cutoff:
+            self.archive_start += 1
+        # Compact once most of the arrays are evicted entries
+        if self.archive_start and self.archive_start * 2 >= len(times):
+            del times[:self.archive_start]
+            del self.archive_efficiency[:self.archive_start]
+            self.archive_start = 0
+
+    def archived(self) -> Tuple[array, array]:
+        """Timestamps (epoch seconds) and efficiencies of readings older than the window."""
+        return self.archive_times[self.archive_start:], self.archive_efficiency[self.archive_start:]
+
+# check_many event type -> (achievement it can unlock, check method)
+EVENT_CHECKS = {
+    "fish_found": (AchievementType.FISH_FOUND, "check_fish_found"),
+    "uav_unstuck": (AchievementType.UAV_UNSTUCK, "check_uav_unstuck"),
+    "local_hero": (AchievementType.LOCAL_HERO, "check_local_hero"),
+    "global_hero": (AchievementType.GLOBAL_HERO, "check_global_hero"),
+    "launch_uav": (AchievementType.LAUNCH_UAV, "check_launch_uav"),
+    "solar_cleaner": (AchievementType.SOLAR_CLEANER, "check_solar_cleaner"),
+    "sellout": (AchievementType.SELLOUT, "check_sellout"),
+}
+
 class AchievementService:
     def __init__(self):
         self.achievements: Dict[str, List[Achievement]] = {}  # profile_id -> achievements
-        self.solar_readings: Dict[str, List[Dict]] = {}  # profile_id -> solar readings
+        self.unlocked: Dict[str, Set[AchievementType]] = {}  # profile_id -> unlocked types, for O(1) checks
+        self.solar_readings: Dict[str, SolarReadingHistory] = {}  # profile_id -> solar readings
+        self.solar_improvements: Dict[str, Dict] = {}  # profile_id -> first qualifying improvement
 
     def add_achievement(self, profile_id: str, achievement_type: AchievementType, metadata: Dict = None) -> Achievement:
         """Add a new achievement for a profile."""
@@ -40,16 +123,21 @@ class AchievementService:
         )
         
         self.achievements[profile_id].append(achievement)
-        logger.info(f"New achievement unlocked: {achievement_type.value} for profile {profile_id}")
+        self.unlocked.setdefault(profile_id, set()).add(achievement_type)
+        logger.info("New achievement unlocked: %s for profile %s", achievement_type.value, profile_id)
         return achievement
 
     def get_achievements(self, profile_id: str) -> List[Achievement]:
         """Get all achievements for a profile."""
         return self.achievements.get(profile_id, [])
 
+    def has_achievement(self, profile_id: str, achievement_type: AchievementType) -> bool:
+        """Check whether a profile has already unlocked an achievement."""
+        return achievement_type in self.unlocked.get(profile_id, ())
+
     def check_fish_found(self, profile_id: str, fish_data: Dict) -> Optional[Achievement]:
         """Check if this is the first fish found by the profile."""
-        if not any(a.type == AchievementType.FISH_FOUND for a in self.achievements.get(profile_id, [])):
+        if not self.has_achievement(profile_id, AchievementType.FISH_FOUND):
             return self.add_achievement(
                 profile_id,
                 AchievementType.FISH_FOUND,
@@ -59,7 +147,7 @@ class AchievementService:
 
     def check_uav_unstuck(self, profile_id: str, uav_id: str, location: Dict) -> Optional[Achievement]:
         """Check if the profile helped a UAV out of a dangerous situation."""
-        if not any(a.type == AchievementType.UAV_UNSTUCK for a in self.achievements.get(profile_id, [])):
+        if not self.has_achievement(profile_id, AchievementType.UAV_UNSTUCK):
             return self.add_achievement(
                 profile_id,
                 AchievementType.UAV_UNSTUCK,
@@ -69,7 +157,7 @@ class AchievementService:
 
     def check_local_hero(self, profile_id: str, rank: int) -> Optional[Achievement]:
         """Check if the profile is at the top of the local leaderboard."""
-        if rank == 1 and not any(a.type == AchievementType.LOCAL_HERO for a in self.achievements.get(profile_id, [])):
+        if rank == 1 and not self.has_achievement(profile_id, AchievementType.LOCAL_HERO):
             return self.add_achievement(
                 profile_id,
                 AchievementType.LOCAL_HERO,
@@ -79,7 +167,7 @@ class AchievementService:
 
     def check_global_hero(self, profile_id: str, rank: int) -> Optional[Achievement]:
         """Check if the profile is at the top of the global leaderboard."""
-        if rank == 1 and not any(a.type == AchievementType.GLOBAL_HERO for a in self.achievements.get(profile_id, [])):
+        if rank == 1 and not self.has_achievement(profile_id, AchievementType.GLOBAL_HERO):
             return self.add_achievement(
                 profile_id,
                 AchievementType.GLOBAL_HERO,
@@ -89,7 +177,7 @@ class AchievementService:
 
     def check_launch_uav(self, profile_id: str, uav_id: str) -> Optional[Achievement]:
         """Check if the profile has launched a purchased UAV."""
-        if not any(a.type == AchievementType.LAUNCH_UAV for a in self.achievements.get(profile_id, [])):
+        if not self.has_achievement(profile_id, AchievementType.LAUNCH_UAV):
             return self.add_achievement(
                 profile_id,
                 AchievementType.LAUNCH_UAV,
@@ -97,50 +185,28 @@ class AchievementService:
             )
         return None
 
-    def record_solar_reading(self, profile_id: str, reading: Dict) -> None:
+    def record_solar_reading(self, profile_id: str, reading: Dict, timestamp: Optional[datetime] = None) -> None:
         """Record a solar panel reading for verification."""
         if profile_id not in self.solar_readings:
-            self.solar_readings[profile_id] = []
-        self.solar_readings[profile_id].append({
+            self.solar_readings[profile_id] = SolarReadingHistory()
+        improvement = self.solar_readings[profile_id].add({
             **reading,
-            "timestamp": datetime.utcnow()
+            "timestamp": timestamp or datetime.utcnow()
         })
+        if improvement is not None:
+            self.solar_improvements.setdefault(profile_id, improvement)
 
     def check_solar_cleaner(self, profile_id: str) -> Optional[Achievement]:
         """Check if the profile has cleaned solar panels based on reading improvements."""
-        if profile_id not in self.solar_readings:
-            return None
-
-        readings = self.solar_readings[profile_id]
-        if len(readings) < 2:
+        # Improvements are detected as readings are recorded
+        improvement = self.solar_improvements.get(profile_id)
+        if improvement is None or self.has_achievement(profile_id, AchievementType.SOLAR_CLEANER):
             return None
-
-        # Sort readings by timestamp
-        readings.sort(key=lambda x: x["timestamp"])
-        
-        # Check if there's a significant improvement in efficiency
-        for i in range(1, len(readings)):
-            prev_reading = readings[i-1]
-            curr_reading = readings[i]
-            
-            # If readings are within 48 hours and efficiency improved by at least 20%
-            if (curr_reading["timestamp"] - prev_reading["timestamp"] <= timedelta(hours=48) and
-                curr_reading["efficiency"] > prev_reading["efficiency"] * 1.2):
-                
-                if not any(a.type == AchievementType.SOLAR_CLEANER for a in self.achievements.get(profile_id, [])):
-                    return self.add_achievement(
-                        profile_id,
-                        AchievementType.SOLAR_CLEANER,
-                        metadata={
-                            "improvement": curr_reading["efficiency"] - prev_reading["efficiency"],
-                            "time_taken": str(curr_reading["timestamp"] - prev_reading["timestamp"])
-                        }
-                    )
-        return None
+        return self.add_achievement(profile_id, AchievementType.SOLAR_CLEANER, metadata=improvement)
 
     def check_sellout(self, profile_id: str, purchase_data: Dict) -> Optional[Achievement]:
         """Check if the profile has made their first purchase."""
-        if not any(a.type == AchievementType.SELLOUT for a in self.achievements.get(profile_id, [])):
+        if not self.has_achievement(profile_id, AchievementType.SELLOUT):
             return self.add_achievement(
                 profile_id,
                 AchievementType.SELLOUT,
@@ -152,6 +218,29 @@ class AchievementService:
             )
         return None
 
+    def check_many(self, events: Iterable[Dict]) -> List[Tuple[str, Achievement]]:
+        """Evaluate a batch of events across many profiles.
+
+        Each event is a dict with ``type`` (one of EVENT_CHECKS), ``profile_id``
+        and the keyword arguments of the matching ``check_*`` method. Returns
+        the newly unlocked achievements as (profile_id, achievement) pairs.
+        """
+        unlocked = []
+        for event in events:
+            event = dict(event)
+            event_type = event.pop("type")
+            if event_type not in EVENT_CHECKS:
+                raise ValueError(f"Unknown achievement event type '{event_type}'")
+            achievement_type, check_name = EVENT_CHECKS[event_type]
+            profile_id = event["profile_id"]
+            # Most events arrive after the achievement is already unlocked
+            if self.has_achievement(profile_id, achievement_type):
+                continue
+            achievement = getattr(self, check_name)(**event)
+            if achievement is not None:
+                unlocked.append((profile_id, achievement))
+        return unlocked
+
     def _get_achievement_description(self, achievement_type: AchievementType) -> str:
         """Get the description for an achievement type."""
         descriptions = {
@@ -1,10 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-from datetime import datetime
-import asyncio
-from uav_simulator import UAVSimulator, Fish
+import os
+from uav_simulator import UAVSimulator, Fish, StaleCursorError
+from uav_fleet import UAVFleet
+from detection_tracker import DetectionTracker, DetectionEvent
+from uav_broadcaster import UAVBroadcaster, BINARY, DELTA, FULL
+from telemetry_codec import SUBPROTOCOL
+from sim_engine import SimulationEngine
 
 app = FastAPI()
 
@@ -19,6 +23,10 @@ app.add_middleware(
 
 # Initialize UAV simulator
 uav = UAVSimulator()
+detection_tracker = DetectionTracker()
+
+# Shared-population fleet of UAVs
+fleet = UAVFleet(size=100)
 
 class FishResponse(BaseModel):
     id: str
@@ -34,75 +42,158 @@ class UAVStatusResponse(BaseModel):
     is_operational: bool
     last_maintenance: str
 
+def serialize_fish(fish: Fish) -> Dict:
+    return {
+        "id": fish.id,
+        "position": {
+            "lat": fish.position.lat,
+            "lon": fish.position.lon,
+            "alt": fish.position.alt
+        },
+        "species": fish.species,
+        "size": fish.size,
+        "last_seen": fish.last_seen.isoformat()
+    }
+
+def serialize_detection_event(event: DetectionEvent) -> Dict:
+    if event.fish is None:
+        return {"event": event.type, "id": event.fish_id}
+    return {"event": event.type, "id": event.fish_id, "fish": serialize_fish(event.fish)}
+
+def require_fleet_uav(uav_id: str) -> str:
+    if uav_id not in fleet.index:
+        raise HTTPException(status_code=404, detail="UAV not found")
+    return uav_id
+
 @app.get("/api/uav/status")
 async def get_uav_status():
-    uav.update_status()
-    return uav.get_status()
+    # Served from the last tick's snapshot; reads never step the simulation
+    return Response(content=engine.snapshot("uav_status").body, media_type="application/json")
 
 @app.get("/api/uav/fish")
-async def get_detected_fish():
-    detected_fish = uav.get_detected_fish()
-    return [
-        {
-            "id": fish.id,
-            "position": {
-                "lat": fish.position.lat,
-                "lon": fish.position.lon,
-                "alt": fish.position.alt
-            },
-            "species": fish.species,
-            "size": fish.size,
-            "last_seen": fish.last_seen.isoformat()
-        }
-        for fish in detected_fish
-    ]
+async def get_detected_fish(
+    response: Response,
+    min_lat: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    min_lon: Optional[float] = None,
+    max_lon: Optional[float] = None,
+    species: Optional[List[str]] = Query(None),
+    min_size: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    scope: str = "detected"
+):
+    """Detected fish (or the whole population with scope=population), filtered
+    by bounding box, species and minimum size. When more fish match than
+    ``limit``, pass the X-Next-Cursor response header back as ``cursor``; a
+    409 means a newer scan replaced the detections and paging must restart."""
+    bbox = (min_lat, max_lat, min_lon, max_lon)
+    if any(v is not None for v in bbox) and any(v is None for v in bbox):
+        raise HTTPException(status_code=400, detail="Bounding box needs min_lat, max_lat, min_lon and max_lon")
+    if scope not in ("detected", "population"):
+        raise HTTPException(status_code=400, detail="scope must be 'detected' or 'population'")
+
+    try:
+        detected_fish, next_cursor = uav.query_fish(
+            detected_only=scope == "detected",
+            bbox=bbox if min_lat is not None else None,
+            species=species,
+            min_size=min_size,
+            after=cursor,
+            limit=limit
+        )
+    except StaleCursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [serialize_fish(fish) for fish in detected_fish]
 
 @app.post("/api/uav/move")
 async def move_uav(lat: float, lon: float, alt: float):
     uav.status.position.lat = lat
     uav.status.position.lon = lon
     uav.status.position.alt = alt
+    engine.publish("uav_status")
     return {"message": "UAV position updated"}
 
 @app.post("/api/uav/maintenance")
 async def perform_maintenance():
-    uav.status.last_maintenance = datetime.now()
+    uav.status.last_maintenance = uav.clock.now()
     uav.status.battery_level = 1.0
     uav.status.is_operational = True
+    engine.publish("uav_status")
     return {"message": "Maintenance completed"}
 
-# WebSocket endpoint for real-time updates
+@app.get("/api/fleet/status")
+async def get_fleet_status():
+    return Response(content=engine.snapshot("fleet_status").body, media_type="application/json")
+
+@app.get("/api/fleet/{uav_id}/status")
+async def get_fleet_uav_status(uav_id: str):
+    return fleet.get_status(require_fleet_uav(uav_id))
+
+@app.get("/api/fleet/{uav_id}/fish")
+async def get_fleet_uav_fish(uav_id: str):
+    detected_fish = fleet.get_detected_fish(require_fleet_uav(uav_id))
+    return [serialize_fish(fish) for fish in detected_fish]
+
+@app.post("/api/fleet/{uav_id}/move")
+async def move_fleet_uav(uav_id: str, lat: float, lon: float, alt: float):
+    fleet.move(require_fleet_uav(uav_id), lat, lon, alt)
+    engine.publish("fleet_status")
+    return {"message": "UAV position updated"}
+
+@app.post("/api/fleet/{uav_id}/maintenance")
+async def perform_fleet_maintenance(uav_id: str):
+    fleet.perform_maintenance(require_fleet_uav(uav_id))
+    engine.publish("fleet_status")
+    return {"message": "Maintenance completed"}
+
+# One shared simulation tick feeds every /ws/uav client
+broadcaster = UAVBroadcaster(uav, detection_tracker, serialize_fish, serialize_detection_event)
+
+# Background engine: steps the simulations every UAV_TICK_SECONDS and publishes
+# the pre-serialized status snapshots that the REST reads return
+engine = SimulationEngine(tick_seconds=float(os.getenv("UAV_TICK_SECONDS", "1.0")))
+engine.add_step(uav.update_status)
+# Scanning is a step of its own so REST reads and the broadcaster share one scan per tick
+engine.add_step(uav.scan)
+engine.add_step(broadcaster.publish)
+engine.add_step(fleet.update_status)
+engine.add_view("uav_status", uav.get_status)
+engine.add_view("fleet_status", fleet.get_statuses)
+
+@app.on_event("startup")
+async def start_engine():
+    engine.start()
+
+@app.on_event("shutdown")
+async def stop_engine():
+    await engine.stop()
+
+# WebSocket endpoint for real-time updates.
+# Pass ?detections=delta to receive entered/moved/left events instead of the
+# full list of detected fish on every frame. Clients offering the
+# "uav-telemetry.v1" subprotocol get compact binary keyframe/delta frames.
 @app.websocket("/ws/uav")
-async def websocket_endpoint(websocket):
-    await websocket.accept()
+async def websocket_endpoint(websocket: WebSocket, detections: str = "full"):
+    if SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        await websocket.accept(subprotocol=SUBPROTOCOL)
+        frames = broadcaster.subscribe(BINARY)
+        send = websocket.send_bytes
+    else:
+        await websocket.accept()
+        frames = broadcaster.subscribe(DELTA if detections == DELTA else FULL)
+        send = websocket.send_text
     try:
         while True:
-            uav.update_status()
-            status = uav.get_status()
-            detected_fish = uav.get_detected_fish()
-            
-            await websocket.send_json({
-                "status": status,
-                "detected_fish": [
-                    {
-                        "id": fish.id,
-                        "position": {
-                            "lat": fish.position.lat,
-                            "lon": fish.position.lon,
-                            "alt": fish.position.alt
-                        },
-                        "species": fish.species,
-                        "size": fish.size,
-                        "last_seen": fish.last_seen.isoformat()
-                    }
-                    for fish in detected_fish
-                ]
-            })
-            
-            await asyncio.sleep(1)  # Update every second
+            await send(await frames.get())
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
+        broadcaster.unsubscribe(frames)
         await websocket.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from uav_simulator import Fish, FishFinder, FishPopulation, GPSPoint, METERS_PER_DEGREE
+
+ENTERED = "entered"
+MOVED = "moved"
+LEFT = "left"
+
+@dataclass
+class DetectionEvent:
+    type: str  # entered, moved, left
+    fish_id: str
+    fish: Optional[Fish] = None  # None for "left" events
+    row: Optional[int] = None  # population row the event refers to
+
+class DetectionTracker:
+    """Turns consecutive scans into entered/moved/left events.
+
+    Only the difference between the previous and the current set of detected
+    rows is materialized, so the cost of a scan update follows how much changed
+    rather than how many fish are in range.
+    """
+
+    def __init__(self, move_threshold_meters: float = 5.0):
+        self.move_threshold = move_threshold_meters
+        self.subscribers: List[Callable[[List[DetectionEvent]], None]] = []
+        self.reset()
+
+    def reset(self):
+        self.population: Optional[FishPopulation] = None
+        self.indices = np.empty(0, dtype=np.int64)
+        # Last reported position of each tracked row
+        self.lat = np.empty(0)
+        self.lon = np.empty(0)
+        self.alt = np.empty(0)
+
+    def current(self) -> List[DetectionEvent]:
+        """``entered`` events for every fish currently detected."""
+        if self.population is None:
+            return []
+        return self._events(ENTERED, self.population, self.indices)
+
+    @staticmethod
+    def _events(event_type: str, population: FishPopulation, rows: np.ndarray) -> List[DetectionEvent]:
+        return [DetectionEvent(event_type, population.fish_id(row), population.fish_at(row), int(row))
+                for row in rows]
+
+    def subscribe(self, callback: Callable[[List[DetectionEvent]], None],
+                  replay: bool = True) -> Callable[[], None]:
+        """Register ``callback`` for every batch of events; returns an unsubscribe function.
+
+        With ``replay`` the new subscriber first receives an ``entered`` event
+        for each fish that is currently detected.
+        """
+        self.subscribers.append(callback)
+        if replay and len(self.indices):
+            callback(self.current())
+
+        def unsubscribe():
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+        return unsubscribe
+
+    def update(self, population: FishPopulation, indices: np.ndarray) -> List[DetectionEvent]:
+        """Diff a new scan result (sorted population rows) against the last one."""
+        events: List[DetectionEvent] = []
+        if population is not self.population:
+            # Row numbers are only meaningful within one population
+            if self.population is not None:
+                events.extend(DetectionEvent(LEFT, self.population.fish_id(i), row=int(i)) for i in self.indices)
+            self.reset()
+            self.population = population
+
+        indices = np.asarray(indices, dtype=np.int64)
+        lat, lon, alt = population.lat[indices], population.lon[indices], population.alt[indices]
+
+        _, previous_slots, current_slots = np.intersect1d(
+            self.indices, indices, assume_unique=True, return_indices=True
+        )
+        left = np.setdiff1d(np.arange(len(self.indices)), previous_slots, assume_unique=True)
+        entered = np.setdiff1d(np.arange(len(indices)), current_slots, assume_unique=True)
+
+        drift = np.hypot(lat[current_slots] - self.lat[previous_slots],
+                         lon[current_slots] - self.lon[previous_slots]) * METERS_PER_DEGREE
+        depth_change = np.abs(alt[current_slots] - self.alt[previous_slots])
+        has_moved = (drift > self.move_threshold) | (depth_change > self.move_threshold)
+        moved = current_slots[has_moved]
+
+        events.extend(DetectionEvent(LEFT, population.fish_id(i), row=int(i)) for i in self.indices[left])
+        events.extend(self._events(ENTERED, population, indices[entered]))
+        events.extend(self._events(MOVED, population, indices[moved]))
+
+        # Fish that have not moved far enough keep their last reported position,
+        # so slow drift still adds up to a "moved" event eventually
+        still, still_previous = current_slots[~has_moved], previous_slots[~has_moved]
+        lat[still] = self.lat[still_previous]
+        lon[still] = self.lon[still_previous]
+        alt[still] = self.alt[still_previous]
+        self.indices, self.lat, self.lon, self.alt = indices, lat, lon, alt
+
+        if events:
+            for callback in list(self.subscribers):
+                callback(events)
+        return events
+
+    def scan(self, fish_finder: FishFinder, uav_position: GPSPoint,
+             population: FishPopulation) -> List[DetectionEvent]:
+        """Run a fish finder scan and return only what changed since the last one."""
+        indices = fish_finder.scan_indices(uav_position, population)
+        if indices is None:
+            return []
+        return self.update(population, indices)
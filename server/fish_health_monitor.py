@@ -1,12 +1,28 @@
-from typing import Dict, List, Optional
+from typing import (TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, List,
+                    Optional, Sequence, Set, Tuple)
 from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import heapq
 import logging
-import requests
-from fastapi import FastAPI, HTTPException
+import math
+import os
+import time
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-import geopandas as gpd
-import pandas as pd
-from geopy.distance import geodesic
+from sortedcontainers import SortedList
+import geohash
+from timeseries import TimeSeries
+from projections import PERCENTILES, MonteCarloProjector
+from monitor_storage import LRUCache, MemoryStorage, MonitorStorage, SQLiteStorage
+
+# aiohttp and geopy are imported where they are first needed to keep worker
+# startup fast; tests/test_startup_time.py guards the import budget
+if TYPE_CHECKING:
+    import aiohttp
+
+DEFAULT_FWS_DATA_URL = "https://fws.maps.arcgis.com/home/item.html?id=5b52826506d544de80d09d3ddf594be6#data"
 
 class FishHealthMetrics(BaseModel):
     species: str
@@ -24,7 +40,7 @@ class InvestmentIndex(BaseModel):
     risk_level: str  # low, medium, high
     expected_return: float
     species_included: List[str]
-    performance_history: List[Dict[str, float]]  # timestamp, return
+    performance_history: List[Dict[str, Any]]  # timestamp (ISO 8601), return
 
 class SavingsAccount(BaseModel):
     balance: float
@@ -62,12 +78,381 @@ class LeaderboardEntry(BaseModel):
     impact_metrics: Dict[str, float]
     distance: Optional[float] = None  # For proximate leaderboard
 
-class FishHealthMonitor:
+class FriendLink(BaseModel):
+    profile_id: str
+    friend_id: str
+
+class InvestmentPosition(BaseModel):
+    species: str
+    amount: float
+    investment_type: str = "direct"
+
+class TTLCache:
+    """Async TTL cache with single-flight loading.
+
+    Concurrent misses for the same key share one in-flight load instead of each
+    going upstream. Failed loads are not cached.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > self.clock():
+            return entry[1]
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._loaded(key, done))
+        # Shielded so one cancelled caller does not cancel the load for the others
+        return await asyncio.shield(task)
+
+    def _loaded(self, key: Hashable, task: asyncio.Future):
+        self.in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.entries.pop(key, None)
+        if len(self.entries) >= self.max_entries:
+            # Dicts keep insertion order, so this drops the oldest entry
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = (self.clock() + self.ttl, task.result())
+
+    def clear(self):
+        self.entries.clear()
+
+class ScoreIndex:
+    """Profile scores kept in descending order for O(log N) updates and rank lookups."""
+
+    def __init__(self):
+        self.scores: Dict[str, float] = {}
+        self.ranking = SortedList()  # (-score, profile_id); ties rank by profile id
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def update(self, profile_id: str, score: float):
+        self.remove(profile_id)
+        self.scores[profile_id] = score
+        self.ranking.add((-score, profile_id))
+
+    def remove(self, profile_id: str):
+        if profile_id in self.scores:
+            self.ranking.remove((-self.scores.pop(profile_id), profile_id))
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        return [(profile_id, -negated) for negated, profile_id in self.ranking.islice(0, max(k, 0))]
+
+    def rank(self, profile_id: str) -> Optional[int]:
+        """1-based rank of a profile, or None if it has no score."""
+        if profile_id not in self.scores:
+            return None
+        return self.ranking.index((-self.scores[profile_id], profile_id)) + 1
+
+    def top_of(self, profile_ids: Iterable[str], k: int) -> List[Tuple[str, float]]:
+        """Highest scoring ``k`` of ``profile_ids``; ids without a score are skipped."""
+        scores = self.scores
+        best = heapq.nsmallest(max(k, 0), ((-scores[p], p) for p in profile_ids if p in scores))
+        return [(profile_id, -negated) for negated, profile_id in best]
+
+class SavingsAccountStore:
+    """Savings accounts kept as NumPy columns, one row per profile.
+
+    ``get`` materializes a SavingsAccount from a row and ``put`` writes one
+    back; batch jobs such as interest accrual work on the columns directly.
+    """
+
+    def __init__(self, capacity: int = 1024, pot_names: Sequence[str] = ()):
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.balance = np.zeros(capacity)
+        self.interest_rate = np.zeros(capacity)
+        self.daily_interest = np.zeros(capacity)
+        self.last_payment = np.zeros(capacity, dtype="datetime64[us]")
+        self.safety_threshold = np.zeros(capacity)
+        self.auto_reinvest = np.zeros(capacity, dtype=bool)
+        self.investment_pots: List[Dict[str, float]] = []
+        # Allocations to the known investment pots, one column per pot name
+        self.pot_names = list(pot_names)
+        self.allocations = np.zeros((capacity, len(self.pot_names)))
+
+    COLUMNS = ("balance", "interest_rate", "daily_interest", "last_payment",
+               "safety_threshold", "auto_reinvest", "allocations")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, profile_id: str) -> bool:
+        return profile_id in self.rows
+
+    def _grow(self):
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros((len(column) * 2,) + column.shape[1:], dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _row(self, profile_id: str) -> int:
+        row = self.rows.get(profile_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.balance):
+                self._grow()
+            self.ids.append(profile_id)
+            self.rows[profile_id] = row
+            self.investment_pots.append({})
+        return row
+
+    def put(self, profile_id: str, account: SavingsAccount):
+        row = self._row(profile_id)
+        self.investment_pots[row] = dict(account.investment_pots)
+        self.balance[row] = account.balance
+        self.interest_rate[row] = account.interest_rate
+        self.daily_interest[row] = account.daily_interest
+        self.last_payment[row] = np.datetime64(account.last_interest_payment, "us")
+        self.safety_threshold[row] = account.safety_threshold
+        self.auto_reinvest[row] = account.auto_reinvest
+        self.allocations[row] = [account.investment_pots.get(name, 0.0) for name in self.pot_names]
+
+    def put_records(self, records: Iterable[Dict]) -> np.ndarray:
+        """Write storage records into their rows; returns the rows written."""
+        rows = []
+        for record in records:
+            row = self._row(record["profile_id"])
+            pots = record["investment_pots"]
+            self.investment_pots[row] = dict(pots)
+            self.balance[row] = record["balance"]
+            self.interest_rate[row] = record["interest_rate"]
+            self.daily_interest[row] = record["daily_interest"]
+            self.last_payment[row] = np.datetime64(record["last_interest_payment"], "us")
+            self.safety_threshold[row] = record["safety_threshold"]
+            self.auto_reinvest[row] = record["auto_reinvest"]
+            self.allocations[row] = [pots.get(name, 0.0) for name in self.pot_names]
+            rows.append(row)
+        return np.array(rows, dtype=np.int64)
+
+    def records(self, rows: Optional[np.ndarray] = None) -> List[Dict]:
+        """Rows as storage records (see monitor_storage.SAVINGS_FIELDS)."""
+        rows = np.arange(len(self.ids)) if rows is None else np.asarray(rows)
+        columns = zip(
+            rows.tolist(),
+            self.balance[rows].tolist(),
+            self.interest_rate[rows].tolist(),
+            self.daily_interest[rows].tolist(),
+            self.last_payment[rows].astype(datetime).tolist(),
+            self.safety_threshold[rows].tolist(),
+            self.auto_reinvest[rows].tolist()
+        )
+        return [
+            {
+                "profile_id": self.ids[row],
+                "balance": balance,
+                "interest_rate": rate,
+                "daily_interest": daily_interest,
+                "last_interest_payment": last_payment.isoformat(),
+                "safety_threshold": threshold,
+                "auto_reinvest": auto_reinvest,
+                "investment_pots": self.investment_pots[row]
+            }
+            for row, balance, rate, daily_interest, last_payment, threshold, auto_reinvest in columns
+        ]
+
+    def get(self, profile_id: str) -> Optional[SavingsAccount]:
+        row = self.rows.get(profile_id)
+        if row is None:
+            return None
+        return SavingsAccount(
+            balance=float(self.balance[row]),
+            interest_rate=float(self.interest_rate[row]),
+            daily_interest=float(self.daily_interest[row]),
+            last_interest_payment=self.last_payment[row].astype(datetime),
+            safety_threshold=float(self.safety_threshold[row]),
+            auto_reinvest=bool(self.auto_reinvest[row]),
+            investment_pots=dict(self.investment_pots[row])
+        )
+
+    def accrue_interest(self, now: datetime, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Pay simple daily interest for every whole day since the last payment.
+
+        Applies to ``rows`` (all accounts by default) in one pass and returns
+        the interest paid per row. The last payment date only advances by the
+        days paid, so partial days carry over to the next run.
+        """
+        if rows is None:
+            rows = slice(0, len(self.ids))
+        days = (np.datetime64(now, "us") - self.last_payment[rows]) // np.timedelta64(1, "D")
+        days = np.maximum(days, 0)
+        interest = self.balance[rows] * (self.interest_rate[rows] / 365) * days
+        self.daily_interest[rows] = interest
+        self.balance[rows] += interest
+        self.last_payment[rows] += days * np.timedelta64(1, "D")
+        return interest
+
+class CommunityImpactStore:
+    """Community impacts kept in a MonitorStorage behind an LRU cache of hot profiles."""
+
+    def __init__(self, storage: MonitorStorage, cache_size: int = 10000):
+        self.storage = storage
+        self.cache = LRUCache(cache_size)
+
+    def get(self, profile_id: str) -> Optional[CommunityImpact]:
+        impact = self.cache.get(profile_id)
+        if impact is None:
+            document = self.storage.get_community_impact(profile_id)
+            if document is None:
+                return None
+            impact = CommunityImpact.parse_raw(document)
+            self.cache.put(profile_id, impact)
+        return impact
+
+    def __getitem__(self, profile_id: str) -> CommunityImpact:
+        impact = self.get(profile_id)
+        if impact is None:
+            raise KeyError(profile_id)
+        return impact
+
+    def __contains__(self, profile_id: str) -> bool:
+        return self.get(profile_id) is not None
+
+    def __setitem__(self, profile_id: str, impact: CommunityImpact):
+        self.put_many([(profile_id, impact)])
+
+    def put_many(self, impacts: Iterable[Tuple[str, CommunityImpact]]):
+        rows = []
+        for profile_id, impact in impacts:
+            self.cache.put(profile_id, impact)
+            rows.append((profile_id, impact.json()))
+        self.storage.upsert_community_impacts(rows)
+
+    def items(self) -> Iterator[Tuple[str, CommunityImpact]]:
+        """Stream every stored impact without filling the cache."""
+        for profile_id, document, _ in self.storage.load_community_impacts():
+            yield profile_id, self.cache.get(profile_id) or CommunityImpact.parse_raw(document)
+
+    def changes(self, since: int) -> Iterator[Tuple[str, CommunityImpact, int]]:
+        """Stream impacts stored after revision ``since``, dropping stale cached copies."""
+        for profile_id, document, revision in self.storage.load_community_impacts(since):
+            self.cache.discard(profile_id)
+            yield profile_id, CommunityImpact.parse_raw(document), revision
+
+class FriendGraph:
+    """Undirected friend graph stored as adjacency sets."""
+
     def __init__(self):
+        self.adjacency: Dict[str, Set[str]] = {}
+
+    def friends(self, profile_id: str) -> Set[str]:
+        return self.adjacency.get(profile_id, set())
+
+    def add(self, profile_id: str, friend_id: str) -> bool:
+        """Connect two profiles; returns False if they already were."""
+        friends = self.adjacency.setdefault(profile_id, set())
+        if friend_id in friends:
+            return False
+        friends.add(friend_id)
+        self.adjacency.setdefault(friend_id, set()).add(profile_id)
+        return True
+
+    def friends_of_friends(self, profile_id: str) -> Set[str]:
+        """Profiles exactly two hops away."""
+        friends = self.friends(profile_id)
+        reachable: Set[str] = set()
+        for friend_id in friends:
+            reachable |= self.adjacency[friend_id]
+        reachable -= friends
+        reachable.discard(profile_id)
+        return reachable
+
+EARTH_RADIUS_KM = 6371.0088
+
+class ProfileLocationIndex:
+    """Grid of lat/lon cells holding profile locations for radius queries.
+
+    A radius query only visits the cells overlapping the circle's bounding box
+    and computes haversine distances for those candidates in one NumPy pass.
+    """
+
+    def __init__(self, cell_degrees: float = 0.25):
+        self.cell = cell_degrees
+        self.columns = int(round(360 / cell_degrees))
+        self.cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        self.profile_cells: Dict[str, Tuple[int, int]] = {}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell), math.floor((lon + 180) / self.cell) % self.columns)
+
+    def update(self, profile_id: str, lat: float, lon: float):
+        self.remove(profile_id)
+        cell = self._cell(lat, lon)
+        self.cells.setdefault(cell, {})[profile_id] = (lat, lon)
+        self.profile_cells[profile_id] = cell
+
+    def remove(self, profile_id: str):
+        cell = self.profile_cells.pop(profile_id, None)
+        if cell is not None:
+            members = self.cells[cell]
+            del members[profile_id]
+            if not members:
+                del self.cells[cell]
+
+    def candidates(self, lat: float, lon: float, radius_km: float):
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        first_row = math.floor((lat - dlat) / self.cell)
+        last_row = math.floor((lat + dlat) / self.cell)
+        cos_lat = min(math.cos(math.radians(min(abs(lat) + dlat, 90.0))), 1.0)
+        if cos_lat < 1e-6 or dlat / cos_lat >= 180:
+            col_offsets = range(self.columns)  # circle reaches a pole or wraps the globe
+            first_col = 0
+        else:
+            dlon = dlat / cos_lat
+            first_col = math.floor((lon - dlon + 180) / self.cell)
+            col_offsets = range(math.floor((lon + dlon + 180) / self.cell) - first_col + 1)
+
+        for row in range(first_row, last_row + 1):
+            for offset in col_offsets:
+                members = self.cells.get((row, (first_col + offset) % self.columns))
+                if members:
+                    yield from members.items()
+
+    def query(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """Profiles within ``radius_km`` (haversine) as (profile_id, distance_km)."""
+        found = list(self.candidates(lat, lon, radius_km))
+        if not found:
+            return []
+        points = np.radians(np.array([point for _, point in found]))
+        lat1, lon1 = math.radians(lat), math.radians(lon)
+        a = (np.sin((points[:, 0] - lat1) / 2)**2 +
+             math.cos(lat1) * np.cos(points[:, 0]) * np.sin((points[:, 1] - lon1) / 2)**2)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return [(found[i][0], float(distances[i])) for i in np.flatnonzero(distances <= radius_km)]
+
+# Annual volatility assumed for indices without enough return history
+RISK_VOLATILITY = {"low": 0.05, "medium": 0.12, "high": 0.25}
+# Longest savings projection served, in days
+MAX_PROJECTION_DAYS = 3650
+
+class FishHealthMonitor:
+    def __init__(self, fws_data_url: Optional[str] = None, health_cache_ttl: float = 300,
+                 health_cache_precision: int = 5, storage: Optional[MonitorStorage] = None,
+                 impact_cache_size: int = 10000, leaderboard_cache_size: int = 1024,
+                 projection_cache_size: int = 4096):
         self.logger = logging.getLogger(__name__)
-        self.fws_data_url = "https://fws.maps.arcgis.com/home/item.html?id=5b52826506d544de80d09d3ddf594be6#data"
-        self.savings_accounts: Dict[str, SavingsAccount] = {}
-        self.market_metrics: List[MarketMetrics] = []
+        # Overridable so tests and local runs can point at a stub upstream
+        self.fws_data_url = fws_data_url or os.getenv("FWS_DATA_URL", DEFAULT_FWS_DATA_URL)
+        self.health_cache = TTLCache(ttl_seconds=health_cache_ttl)
+        self.health_cache_precision = health_cache_precision  # geohash length, 5 is ~5km cells
+        self._http: Optional["aiohttp.ClientSession"] = None
+        # Market health samples and index returns are kept in bounded time
+        # series; latest_market_metrics is the most recent full reading
+        self.market_health = TimeSeries()
+        self.latest_market_metrics: Optional[MarketMetrics] = None
         self.investment_indices = {
             "sustainable_fisheries": InvestmentIndex(
                 name="Sustainable Fisheries Index",
@@ -94,32 +479,133 @@ class FishHealthMonitor:
                 performance_history=[]
             )
         }
-        self.community_impacts: Dict[str, CommunityImpact] = {}
-        self.friends_network: Dict[str, List[str]] = {}
+        self.savings_accounts = SavingsAccountStore(pot_names=list(self.investment_indices))
+        self.index_performance = {name: TimeSeries() for name in self.investment_indices}
+        self.projector = MonteCarloProjector()
+        self.projection_cache = LRUCache(projection_cache_size)
+        self._projection_parameters_stale = True
+        # Savings accounts, impacts and friendships are written through to
+        # storage. The in-memory indexes are built from it on startup and
+        # brought up to date by sync() with what other workers wrote since
+        self.storage = storage or MemoryStorage()
+        self.community_impacts = CommunityImpactStore(self.storage, impact_cache_size)
+        self.global_scores = ScoreIndex()
+        self.profile_locations = ProfileLocationIndex()
+        self.friends_network = FriendGraph()
+        # Serialized leaderboards keyed by (board, params, version); any impact
+        # or friendship change bumps the version
+        self.leaderboard_version = 0
+        self.leaderboard_cache = LRUCache(leaderboard_cache_size)
+        # Local boards snap to the coarsest geohash cell whose snap error stays
+        # within this fraction of the query radius
+        self.leaderboard_snap_fraction = 0.02
+        self._storage_revisions = {'savings': 0, 'impacts': 0, 'links': 0}
+        self._storage_version: Optional[int] = None
+        self.sync()
+
+    def sync(self):
+        """Apply what other workers wrote to storage since the last sync
+
+        Only rows with a newer revision are read, and nothing at all when the
+        storage reports no outside writes.
+        """
+        version = self.storage.data_version()
+        if version == self._storage_version:
+            return
+        self._storage_version = version
+        revisions = self._storage_revisions
+
+        accounts = list(self.storage.load_savings_accounts(revisions['savings']))
+        if accounts:
+            revisions['savings'] = max(account['revision'] for account in accounts)
+            self.savings_accounts.put_records(accounts)
+
+        changed = False
+        for profile_id, impact, revision in self.community_impacts.changes(revisions['impacts']):
+            revisions['impacts'] = max(revisions['impacts'], revision)
+            self.global_scores.update(profile_id, self.calculate_impact_score(impact))
+            self.profile_locations.update(profile_id, impact.location['lat'], impact.location['lon'])
+            changed = True
+        for profile_id, friend_id, revision in self.storage.load_friend_links(revisions['links']):
+            revisions['links'] = max(revisions['links'], revision)
+            changed = self.friends_network.add(profile_id, friend_id) or changed
+        if changed:
+            self._bump_leaderboard_version()
+
+    def _update_savings(self, apply: Callable[[np.ndarray], Any], profile_id: Optional[str] = None) -> Any:
+        """Run ``apply`` on savings rows freshly read inside a storage transaction
+
+        Covers one profile's row (which ``apply`` may create) or every account.
+        Changes are applied to the stored values, so concurrent updates from
+        other workers are built on instead of overwritten.
+        """
+        result = None
+
+        def modify(records: List[Dict]) -> List[Dict]:
+            nonlocal result
+            rows = self.savings_accounts.put_records(records)
+            result = apply(rows)
+            if profile_id is not None:
+                row = self.savings_accounts.rows.get(profile_id)
+                rows = np.array([] if row is None else [row], dtype=np.int64)
+            return self.savings_accounts.records(rows)
+
+        self.storage.update_savings_accounts(modify, profile_id)
+        return result
+
+    async def http_session(self) -> "aiohttp.ClientSession":
+        """Shared client session; its connector pools upstream connections."""
+        import aiohttp
+
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._http
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+        self.storage.close()
 
     async def get_fish_health_data(self, species: str, location: Dict[str, float]) -> FishHealthMetrics:
+        # Nearby requests for the same species share one cached upstream fetch
+        cell = geohash.encode(location["lat"], location["lon"], self.health_cache_precision)
         try:
-            # Fetch data from FWS ArcGIS service
-            # This is a placeholder for the actual API integration
-            response = requests.get(self.fws_data_url)
-            
-            # Process the data and return metrics
-            # For now, return mock data
-            return FishHealthMetrics(
-                species=species,
-                population_health=85.0,
-                conservation_status="Stable",
-                habitat_quality=90.0,
-                reproduction_rate=1.2,
-                last_updated=datetime.now(),
-                location=location,
-                data_source="FWS ArcGIS"
+            metrics = await self.health_cache.get_or_load(
+                (species, cell),
+                lambda: self._fetch_fish_health_data(species, location)
             )
+            return metrics.copy(update={"location": location})
         except Exception as e:
             self.logger.error(f"Error fetching fish health data: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch fish health data")
 
-    def calculate_investment_return(self, 
+    async def _fetch_fish_health_data(self, species: str, location: Dict[str, float]) -> FishHealthMetrics:
+        # Fetch data from FWS ArcGIS service
+        # This is a placeholder for the actual API integration
+        session = await self.http_session()
+        async with session.get(self.fws_data_url) as response:
+            # Raising keeps an error response out of the health cache
+            response.raise_for_status()
+            await response.read()
+
+        # Process the data and return metrics
+        # For now, return mock data
+        return FishHealthMetrics(
+            species=species,
+            population_health=85.0,
+            conservation_status="Stable",
+            habitat_quality=90.0,
+            reproduction_rate=1.2,
+            last_updated=datetime.now(),
+            location=location,
+            data_source="FWS ArcGIS"
+        )
+
+    async def calculate_investment_return(self, 
                                  species: str, 
                                  amount: float, 
                                  investment_type: str = "direct") -> float:
@@ -128,7 +614,7 @@ class FishHealthMonitor:
         """
         if investment_type == "direct":
             # Direct investment in specific species
-            health_data = self.get_fish_health_data(species, {"lat": 0, "lon": 0})
+            health_data = await self.get_fish_health_data(species, {"lat": 0, "lon": 0})
             base_return = 0.05  # 5% base return
             
             # Adjust return based on population health
@@ -143,18 +629,61 @@ class FishHealthMonitor:
         else:
             raise ValueError(f"Unknown investment type: {investment_type}")
 
-    def get_investment_options(self) -> List[InvestmentIndex]:
-        return list(self.investment_indices.values())
+    async def calculate_investment_returns(self, positions: List[InvestmentPosition]) -> np.ndarray:
+        """
+        Price many positions at once; same rates as calculate_investment_return.
+        Health data is fetched once per distinct species of the direct positions.
+        """
+        types = np.array([p.investment_type for p in positions], dtype=object)
+        unknown = set(types) - set(self.investment_indices) - {"direct"}
+        if unknown:
+            raise ValueError(f"Unknown investment type: {', '.join(sorted(unknown))}")
+
+        rates = np.zeros(len(positions))
+        for name, index in self.investment_indices.items():
+            rates[types == name] = index.expected_return
+
+        direct = np.flatnonzero(types == "direct")
+        if len(direct):
+            species, inverse = np.unique([positions[i].species for i in direct], return_inverse=True)
+            health = await asyncio.gather(*[
+                self.get_fish_health_data(name, {"lat": 0, "lon": 0}) for name in species
+            ])
+            health_factor = np.array([h.population_health for h in health]) / 100
+            rates[direct] = 0.05 * health_factor[inverse]  # 5% base return
+        return rates
+
+    def get_investment_options(self, history_limit: int = 100) -> List[InvestmentIndex]:
+        """Investment indices with their most recent ``history_limit`` returns"""
+        return [
+            index.copy(update={
+                "performance_history": self.index_performance[name].records("return", limit=history_limit)
+            })
+            for name, index in self.investment_indices.items()
+        ]
 
     def update_index_performance(self, index_name: str, performance: float):
         if index_name in self.investment_indices:
-            self.investment_indices[index_name].performance_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "return": performance
-            })
+            self.index_performance[index_name].append(performance)
+            self._projection_parameters_stale = True
 
-    def create_savings_account(self, profile_id: str) -> SavingsAccount:
-        account = SavingsAccount(
+    def get_index_performance(self, index_name: str, tier: str = "raw", limit: Optional[int] = None) -> Dict:
+        """Return history of an index at a resolution tier, plus rolling stats"""
+        series = self.index_performance.get(index_name)
+        if series is None:
+            raise HTTPException(status_code=404, detail="Investment index not found")
+        stats = series.stats()
+        return {
+            "index": index_name,
+            "tier": tier,
+            "mean_return": stats["mean"],
+            "volatility": stats["volatility"],
+            "trend": stats["slope"],
+            "history": series.records("return", tier=tier, limit=limit)
+        }
+
+    def _new_savings_account(self) -> SavingsAccount:
+        return SavingsAccount(
             balance=0.0,
             interest_rate=0.04,  # 4% APY
             daily_interest=0.0,
@@ -167,23 +696,36 @@ class FishHealthMonitor:
                 "local_food_security": 0.20
             }
         )
-        self.savings_accounts[profile_id] = account
+
+    def create_savings_account(self, profile_id: str) -> SavingsAccount:
+        account = self._new_savings_account()
+        self._update_savings(lambda rows: self.savings_accounts.put(profile_id, account), profile_id)
         return account
 
+    def import_savings_accounts(self, accounts: Iterable[Tuple[str, SavingsAccount]]):
+        """Store many accounts at once, replacing any existing ones"""
+        rows = []
+        for profile_id, account in accounts:
+            self.savings_accounts.put(profile_id, account)
+            rows.append(self.savings_accounts.rows[profile_id])
+        self.storage.upsert_savings_accounts(self.savings_accounts.records(np.array(rows, dtype=np.int64)))
+
     def calculate_daily_interest(self, profile_id: str) -> float:
-        account = self.savings_accounts.get(profile_id)
-        if not account:
-            raise HTTPException(status_code=404, detail="Savings account not found")
-        
-        days_since_last_payment = (datetime.now() - account.last_interest_payment).days
-        daily_rate = account.interest_rate / 365
-        interest = account.balance * daily_rate * days_since_last_payment
-        
-        account.daily_interest = interest
-        account.balance += interest
-        account.last_interest_payment = datetime.now()
-        
-        return interest
+        def accrue(rows: np.ndarray) -> np.ndarray:
+            if not len(rows):
+                raise HTTPException(status_code=404, detail="Savings account not found")
+            return self.savings_accounts.accrue_interest(datetime.now(), rows)
+
+        return float(self._update_savings(accrue, profile_id)[0])
+
+    def accrue_all_interest(self) -> Dict[str, float]:
+        """Nightly job: pay interest on every savings account in one pass"""
+        interest = self._update_savings(lambda rows: self.savings_accounts.accrue_interest(datetime.now(), rows))
+        return {
+            'accounts': len(interest),
+            'accounts_paid': int(np.count_nonzero(interest)),
+            'total_interest': float(interest.sum())
+        }
 
     def update_market_metrics(self):
         # Simulate market data collection
@@ -191,8 +733,8 @@ class FishHealthMonitor:
         volatility = 0.15  # 15% volatility
         
         trend = "stable"
-        if len(self.market_metrics) > 0:
-            last_health = self.market_metrics[-1].market_health
+        last_health = self.market_health.last()
+        if last_health is not None:
             if current_health > last_health + 5:
                 trend = "up"
             elif current_health < last_health - 5:
@@ -212,49 +754,201 @@ class FishHealthMonitor:
             recommended_action=recommended_action
         )
         
-        self.market_metrics.append(metrics)
+        self.market_health.append(current_health, metrics.timestamp.timestamp())
+        self.latest_market_metrics = metrics
         return metrics
 
+    def _update_projection_parameters(self):
+        """Fit per-day log-return parameters for the projector from index history
+
+        Each recorded performance is treated as a daily return. Indices with
+        fewer than two samples fall back to their expected return and a
+        volatility for their risk level; correlations are only estimated when
+        every index has history.
+        """
+        names = self.savings_accounts.pot_names
+        means, variances, histories = [], [], []
+        for name in names:
+            _, returns = self.index_performance[name].arrays()
+            log_returns = np.log1p(returns)
+            if len(log_returns) >= 2:
+                means.append(log_returns.mean())
+                variances.append(log_returns.var(ddof=1))
+            else:
+                index = self.investment_indices[name]
+                means.append(math.log1p(index.expected_return) / 365)
+                variances.append(RISK_VOLATILITY.get(index.risk_level, 0.12) ** 2 / 365)
+            histories.append(log_returns)
+
+        cov = np.diag(variances)
+        common = min(len(history) for history in histories) if histories else 0
+        if common >= 2:
+            cov = np.atleast_2d(np.cov(np.vstack([history[-common:] for history in histories])))
+        self.projector.set_parameters(means, cov)
+        self.projection_cache.clear()
+        self._projection_parameters_stale = False
+
+    def _project_allocations(self, allocations: np.ndarray, interest_rates: np.ndarray,
+                             horizon_days: int) -> Dict[str, np.ndarray]:
+        """Growth distributions for (allocation vector, savings rate) rows
+
+        Results are cached per distinct row, so accounts sharing an allocation
+        share one projection.
+        """
+        if self._projection_parameters_stale:
+            self._update_projection_parameters()
+
+        keys = np.hstack([allocations, interest_rates[:, None]])
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        cache_keys = [(horizon_days,) + tuple(row) for row in unique.tolist()]
+        results = [self.projection_cache.get(key) for key in cache_keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            rows = unique[missing]
+            cash_growth = (1 + rows[:, -1] / 365) ** horizon_days
+            projected = self.projector.project(rows[:, :-1], cash_growth, horizon_days)
+            for j, i in enumerate(missing):
+                results[i] = {field: values[j] for field, values in projected.items()}
+                self.projection_cache.put(cache_keys[i], results[i])
+
+        return {
+            field: np.stack([result[field] for result in results])[inverse]
+            for field in ("percentiles", "mean", "loss_probability")
+        }
+
+    def project_all_savings(self, horizon_days: int = 365) -> Dict[str, Any]:
+        """Projected balance distributions for every savings account"""
+        self.sync()
+        accounts = self.savings_accounts
+        count = len(accounts)
+        growth = self._project_allocations(accounts.allocations[:count], accounts.interest_rate[:count], horizon_days)
+        balance = accounts.balance[:count]
+        return {
+            'profile_ids': accounts.ids,
+            'percentiles': PERCENTILES,
+            'balance_percentiles': growth['percentiles'] * balance[:, None],
+            'expected_balance': growth['mean'] * balance,
+            'loss_probability': growth['loss_probability']
+        }
+
+    def project_savings(self, profile_id: str, horizon_days: int = 365) -> Dict[str, Any]:
+        """Projected balance distribution for one savings account"""
+        self.sync()
+        row = self.savings_accounts.rows.get(profile_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Savings account not found")
+        accounts = self.savings_accounts
+        growth = self._project_allocations(accounts.allocations[row:row + 1],
+                                           accounts.interest_rate[row:row + 1], horizon_days)
+        balance = float(accounts.balance[row])
+        return {
+            'profile_id': profile_id,
+            'horizon_days': horizon_days,
+            'balance': balance,
+            'expected_balance': float(growth['mean'][0] * balance),
+            'loss_probability': float(growth['loss_probability'][0]),
+            'percentiles': {
+                str(percentile): float(value * balance)
+                for percentile, value in zip(PERCENTILES, growth['percentiles'][0])
+            }
+        }
+
+    def _rebalance_rows(self, action: str, rows: np.ndarray) -> np.ndarray:
+        """Apply ``action`` to the given account rows in one pass.
+
+        Returns the amount moved per row and investment pot: positive for
+        funds invested, negative for funds divested back to savings.
+        """
+        accounts = self.savings_accounts
+        allocations = accounts.allocations[rows]
+        balance = accounts.balance[rows]
+
+        if action == "divest":
+            # Move funds back to savings; each pot returns half its allocation
+            # of the balance as it stands after the previous pots
+            growth = 1 + allocations * 0.5
+            before = balance[:, None] * np.cumprod(np.hstack([np.ones((len(rows), 1)), growth[:, :-1]]), axis=1)
+            moved = -before * allocations * 0.5
+        elif action == "invest":
+            # Invest available funds according to allocation
+            available_for_investment = balance * (1 - accounts.safety_threshold[rows])
+            moved = available_for_investment[:, None] * allocations
+        else:
+            return np.zeros_like(allocations)
+
+        accounts.balance[rows] = balance - moved.sum(axis=1)
+        return moved
+
     def auto_rebalance_portfolio(self, profile_id: str):
-        account = self.savings_accounts.get(profile_id)
-        if not account or not account.auto_reinvest:
-            return
-        
         market_metrics = self.update_market_metrics()
-        
-        if market_metrics.recommended_action == "divest":
-            # Move funds back to savings
-            for index_name in account.investment_pots:
-                if index_name in self.investment_indices:
-                    # Calculate amount to divest based on market conditions
-                    divest_amount = account.balance * account.investment_pots[index_name] * 0.5
-                    account.balance += divest_amount
-                    self.logger.info(f"Auto-divested {divest_amount} from {index_name}")
-        
-        elif market_metrics.recommended_action == "invest":
-            # Invest available funds according to allocation
-            available_for_investment = account.balance * (1 - account.safety_threshold)
-            for index_name, allocation in account.investment_pots.items():
-                if index_name in self.investment_indices:
-                    invest_amount = available_for_investment * allocation
-                    account.balance -= invest_amount
-                    self.logger.info(f"Auto-invested {invest_amount} in {index_name}")
+
+        def rebalance(rows: np.ndarray) -> Optional[np.ndarray]:
+            if not len(rows) or not self.savings_accounts.auto_reinvest[rows[0]]:
+                return None
+            return self._rebalance_rows(market_metrics.recommended_action, rows)[0]
+
+        moved = self._update_savings(rebalance, profile_id)
+        if moved is None:
+            return
+        for index_name, amount in zip(self.savings_accounts.pot_names, moved):
+            if amount > 0:
+                self.logger.info("Auto-invested %s in %s", amount, index_name)
+            elif amount < 0:
+                self.logger.info("Auto-divested %s from %s", -amount, index_name)
+
+    def rebalance_all_portfolios(self, market_metrics: Optional[MarketMetrics] = None) -> Dict:
+        """Rebalance every auto-reinvest account against one market snapshot"""
+        if market_metrics is None:
+            market_metrics = self.update_market_metrics()
+        accounts = self.savings_accounts
+
+        def rebalance(rows: np.ndarray) -> np.ndarray:
+            return self._rebalance_rows(market_metrics.recommended_action, rows[accounts.auto_reinvest[rows]])
+
+        moved = self._update_savings(rebalance)
+
+        per_pot = moved.sum(axis=0)
+        report = {
+            'timestamp': market_metrics.timestamp,
+            'action': market_metrics.recommended_action,
+            'market_health': market_metrics.market_health,
+            'accounts': len(accounts),
+            'accounts_rebalanced': int(np.count_nonzero(moved.any(axis=1))),
+            'total_invested': float(moved[moved > 0].sum()),
+            'total_divested': float(-moved[moved < 0].sum()),
+            'by_pot': {name: float(amount) for name, amount in zip(accounts.pot_names, per_pot)}
+        }
+        self.logger.info("Rebalanced %d accounts (%s)", report['accounts_rebalanced'], report['action'])
+        return report
 
     def get_savings_account(self, profile_id: str) -> SavingsAccount:
-        if profile_id not in self.savings_accounts:
-            return self.create_savings_account(profile_id)
-        return self.savings_accounts[profile_id]
+        self.sync()
+        account = self.savings_accounts.get(profile_id)
+        if account is None:
+            # Another worker may be creating the same account; keep theirs if so
+            def create(rows: np.ndarray):
+                if not len(rows):
+                    self.savings_accounts.put(profile_id, self._new_savings_account())
+
+            self._update_savings(create, profile_id)
+            account = self.savings_accounts.get(profile_id)
+        return account
 
     def update_savings_settings(self, 
                               profile_id: str, 
                               safety_threshold: float,
                               auto_reinvest: bool,
                               investment_pots: Dict[str, float]) -> SavingsAccount:
-        account = self.get_savings_account(profile_id)
-        account.safety_threshold = safety_threshold
-        account.auto_reinvest = auto_reinvest
-        account.investment_pots = investment_pots
-        return account
+        def update(rows: np.ndarray) -> SavingsAccount:
+            account = self.savings_accounts.get(profile_id) if len(rows) else self._new_savings_account()
+            account.safety_threshold = safety_threshold
+            account.auto_reinvest = auto_reinvest
+            account.investment_pots = investment_pots
+            self.savings_accounts.put(profile_id, account)
+            return account
+
+        return self._update_savings(update, profile_id)
 
     def calculate_impact_score(self, impact: CommunityImpact) -> float:
         """Calculate overall impact score based on various metrics"""
@@ -276,6 +970,7 @@ class FishHealthMonitor:
 
     def update_community_impact(self, profile_id: str, impact_data: Dict) -> CommunityImpact:
         """Update or create community impact data for a profile"""
+        self.sync()
         impact = CommunityImpact(
             profile_id=profile_id,
             name=impact_data.get('name', ''),
@@ -286,135 +981,243 @@ class FishHealthMonitor:
             local_food_impact=impact_data.get('local_food_impact', 0),
             community_rating=impact_data.get('community_rating', 0),
             last_updated=datetime.now(),
-            friends=impact_data.get('friends', [])
+            friends=list(self.friends_network.friends(profile_id))
         )
-        
-        self.community_impacts[profile_id] = impact
+
+        # Like add_friend, links to profiles that do not exist are skipped
+        changed = {profile_id: impact}
+        links = [
+            (profile_id, friend_id) for friend_id in impact_data.get('friends', [])
+            if friend_id in self.community_impacts and self._connect(profile_id, friend_id, changed)
+        ]
+        self._save_friend_links(links, changed)
+        self.global_scores.update(profile_id, self.calculate_impact_score(impact))
+        self.profile_locations.update(profile_id, impact.location['lat'], impact.location['lon'])
+        self._bump_leaderboard_version()
         return impact
 
+    def _bump_leaderboard_version(self):
+        self.leaderboard_version += 1
+        self.leaderboard_cache.clear()
+
+    def cached_leaderboard(self, board: str, params: Tuple,
+                           build: Callable[[], List[LeaderboardEntry]]) -> Tuple[bytes, str]:
+        """Serialized leaderboard and its ETag, reused until the version changes"""
+        self.sync()
+        key = (board, params, self.leaderboard_version)
+        cached = self.leaderboard_cache.get(key)
+        if cached is None:
+            body = ("[" + ",".join(entry.json() for entry in build()) + "]").encode("utf-8")
+            cached = (body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest())
+            self.leaderboard_cache.put(key, cached)
+        return cached
+
+    def local_leaderboard_cell(self, lat: float, lon: float, radius_km: float) -> Tuple[str, Dict[str, float]]:
+        """Geohash cell a local board query snaps to, and the cell's center
+
+        Larger radii tolerate larger cells, so more nearby queries share a board.
+        """
+        max_error_km = self.leaderboard_snap_fraction * radius_km
+        for precision in range(1, 13):
+            lat_size, lon_size = geohash.cell_size(precision)
+            # Half the cell diagonal, measuring longitude as at the equator
+            if math.radians(math.hypot(lat_size, lon_size)) / 2 * EARTH_RADIUS_KM <= max_error_km:
+                break
+        cell = geohash.encode(lat, lon, precision)
+        center_lat, center_lon = geohash.decode(cell)
+        return cell, {'lat': center_lat, 'lon': center_lon}
+
+    def _leaderboard_entry(self, profile_id: str, score: float, rank: int,
+                           distance: Optional[float] = None) -> LeaderboardEntry:
+        impact = self.community_impacts[profile_id]
+        return LeaderboardEntry(
+            profile_id=profile_id,
+            name=impact.name,
+            score=score,
+            rank=rank,
+            impact_metrics={
+                'investment': impact.total_investment,
+                'sustainable_catches': impact.sustainable_catches,
+                'conservation': impact.conservation_contributions,
+                'local_food': impact.local_food_impact
+            },
+            distance=distance
+        )
+
     def get_global_leaderboard(self, limit: int = 100) -> List[LeaderboardEntry]:
         """Get global leaderboard sorted by impact score"""
-        entries = []
-        for profile_id, impact in self.community_impacts.items():
-            score = self.calculate_impact_score(impact)
-            entries.append(LeaderboardEntry(
-                profile_id=profile_id,
-                name=impact.name,
-                score=score,
-                rank=0,  # Will be set after sorting
-                impact_metrics={
-                    'investment': impact.total_investment,
-                    'sustainable_catches': impact.sustainable_catches,
-                    'conservation': impact.conservation_contributions,
-                    'local_food': impact.local_food_impact
-                }
-            ))
-        
-        # Sort by score and assign ranks
-        entries.sort(key=lambda x: x.score, reverse=True)
-        for i, entry in enumerate(entries[:limit]):
-            entry.rank = i + 1
-        
-        return entries[:limit]
-
-    def get_local_leaderboard(self, location: Dict[str, float], radius_km: float = 50, limit: int = 100) -> List[LeaderboardEntry]:
-        """Get leaderboard for profiles within a certain radius"""
-        entries = []
-        for profile_id, impact in self.community_impacts.items():
-            distance = geodesic(
-                (location['lat'], location['lon']),
-                (impact.location['lat'], impact.location['lon'])
-            ).kilometers
-            
-            if distance <= radius_km:
-                score = self.calculate_impact_score(impact)
-                entries.append(LeaderboardEntry(
-                    profile_id=profile_id,
-                    name=impact.name,
-                    score=score,
-                    rank=0,
-                    impact_metrics={
-                        'investment': impact.total_investment,
-                        'sustainable_catches': impact.sustainable_catches,
-                        'conservation': impact.conservation_contributions,
-                        'local_food': impact.local_food_impact
-                    },
-                    distance=distance
-                ))
-        
+        self.sync()
+        # Scores are kept ordered by update_community_impact, so only the top
+        # `limit` entries are ever built
+        return [
+            self._leaderboard_entry(profile_id, score, rank)
+            for rank, (profile_id, score) in enumerate(self.global_scores.top(limit), start=1)
+        ]
+
+    def get_global_rank(self, profile_id: str) -> Optional[LeaderboardEntry]:
+        """Get a single profile's position on the global leaderboard"""
+        self.sync()
+        rank = self.global_scores.rank(profile_id)
+        if rank is None:
+            return None
+        return self._leaderboard_entry(profile_id, self.global_scores.scores[profile_id], rank)
+
+    def get_local_leaderboard(self, location: Dict[str, float], radius_km: float = 50, limit: int = 100,
+                              precise: bool = False) -> List[LeaderboardEntry]:
+        """Get leaderboard for profiles within a certain radius
+
+        Candidates come from the location index with haversine distances. With
+        ``precise`` the ones near the edge are re-measured with geodesic, which
+        differs from haversine by at most ~0.5%.
+        """
+        self.sync()
+        lat, lon = location['lat'], location['lon']
+        if precise:
+            from geopy.distance import geodesic
+
+            nearby = []
+            for profile_id, distance in self.profile_locations.query(lat, lon, radius_km * 1.01):
+                if distance > radius_km * 0.99:
+                    point = self.community_impacts[profile_id].location
+                    distance = geodesic((lat, lon), (point['lat'], point['lon'])).kilometers
+                if distance <= radius_km:
+                    nearby.append((profile_id, distance))
+        else:
+            nearby = self.profile_locations.query(lat, lon, radius_km)
+
         # Sort by score and assign ranks
-        entries.sort(key=lambda x: x.score, reverse=True)
-        for i, entry in enumerate(entries[:limit]):
-            entry.rank = i + 1
-        
-        return entries[:limit]
+        scores = self.global_scores.scores
+        nearby.sort(key=lambda item: (-scores[item[0]], item[0]))
+        return [
+            self._leaderboard_entry(profile_id, scores[profile_id], rank, distance=distance)
+            for rank, (profile_id, distance) in enumerate(nearby[:limit], start=1)
+        ]
+
+    def _ranked_leaderboard(self, profile_ids: Iterable[str], limit: int) -> List[LeaderboardEntry]:
+        return [
+            self._leaderboard_entry(profile_id, score, rank)
+            for rank, (profile_id, score) in enumerate(self.global_scores.top_of(profile_ids, limit), start=1)
+        ]
 
     def get_friends_leaderboard(self, profile_id: str, limit: int = 100) -> List[LeaderboardEntry]:
         """Get leaderboard for friends of a profile"""
+        self.sync()
         if profile_id not in self.community_impacts:
             return []
-        
-        friends = self.community_impacts[profile_id].friends
-        entries = []
-        
-        for friend_id in friends:
-            if friend_id in self.community_impacts:
-                impact = self.community_impacts[friend_id]
-                score = self.calculate_impact_score(impact)
-                entries.append(LeaderboardEntry(
-                    profile_id=friend_id,
-                    name=impact.name,
-                    score=score,
-                    rank=0,
-                    impact_metrics={
-                        'investment': impact.total_investment,
-                        'sustainable_catches': impact.sustainable_catches,
-                        'conservation': impact.conservation_contributions,
-                        'local_food': impact.local_food_impact
-                    }
-                ))
-        
-        # Sort by score and assign ranks
-        entries.sort(key=lambda x: x.score, reverse=True)
-        for i, entry in enumerate(entries[:limit]):
-            entry.rank = i + 1
-        
-        return entries[:limit]
+        return self._ranked_leaderboard(self.friends_network.friends(profile_id), limit)
+
+    def get_friends_of_friends_leaderboard(self, profile_id: str, limit: int = 100) -> List[LeaderboardEntry]:
+        """Get leaderboard for profiles two hops away, excluding direct friends"""
+        self.sync()
+        if profile_id not in self.community_impacts:
+            return []
+        return self._ranked_leaderboard(self.friends_network.friends_of_friends(profile_id), limit)
+
+    def _connect(self, profile_id: str, friend_id: str, changed: Dict[str, CommunityImpact]) -> bool:
+        """Link two profiles in the graph; impacts whose friends list changed go into ``changed``"""
+        if profile_id == friend_id or not self.friends_network.add(profile_id, friend_id):
+            return False
+        # Keep the friends lists on the profiles in step with the graph
+        for source, target in ((profile_id, friend_id), (friend_id, profile_id)):
+            impact = changed.get(source) or self.community_impacts.get(source)
+            if impact is not None:
+                impact.friends.append(target)
+                changed[source] = impact
+        return True
+
+    def _save_friend_links(self, links: List[Tuple[str, str]], changed: Dict[str, CommunityImpact]):
+        self.storage.add_friend_links(links)
+        self.community_impacts.put_many(changed.items())
+        if links:
+            self._bump_leaderboard_version()
 
     def add_friend(self, profile_id: str, friend_id: str) -> bool:
         """Add a friend connection between two profiles"""
+        self.sync()
         if profile_id not in self.community_impacts or friend_id not in self.community_impacts:
             return False
-        
-        if friend_id not in self.community_impacts[profile_id].friends:
-            self.community_impacts[profile_id].friends.append(friend_id)
-        if profile_id not in self.community_impacts[friend_id].friends:
-            self.community_impacts[friend_id].friends.append(profile_id)
-        
+        changed: Dict[str, CommunityImpact] = {}
+        if self._connect(profile_id, friend_id, changed):
+            self._save_friend_links([(profile_id, friend_id)], changed)
         return True
 
+    def import_friends(self, links: Iterable[Tuple[str, str]]) -> Dict[str, int]:
+        """Add many friend connections at once.
+
+        Links to unknown profiles or to oneself are skipped; links that already
+        exist are counted as duplicates.
+        """
+        self.sync()
+        new_links: List[Tuple[str, str]] = []
+        changed: Dict[str, CommunityImpact] = {}
+        duplicates = skipped = 0
+        for profile_id, friend_id in links:
+            if (profile_id == friend_id or profile_id not in self.community_impacts
+                    or friend_id not in self.community_impacts):
+                skipped += 1
+            elif self._connect(profile_id, friend_id, changed):
+                new_links.append((profile_id, friend_id))
+            else:
+                duplicates += 1
+        self._save_friend_links(new_links, changed)
+        return {'added': len(new_links), 'duplicates': duplicates, 'skipped': skipped}
+
 # FastAPI Router
 router = FastAPI()
-monitor = FishHealthMonitor()
+# Set FISH_MONITOR_DB to a file path to persist monitor state in SQLite
+monitor = FishHealthMonitor(
+    storage=SQLiteStorage(os.environ["FISH_MONITOR_DB"]) if os.getenv("FISH_MONITOR_DB") else None
+)
+
+@router.on_event("shutdown")
+async def close_monitor():
+    await monitor.close()
 
 @router.get("/fish-health/{species}", response_model=FishHealthMetrics)
 async def get_fish_health(species: str, lat: float, lon: float):
     return await monitor.get_fish_health_data(species, {"lat": lat, "lon": lon})
 
 @router.get("/investment-indices", response_model=List[InvestmentIndex])
-async def get_investment_indices():
-    return monitor.get_investment_options()
+async def get_investment_indices(history_limit: int = 100):
+    return monitor.get_investment_options(history_limit)
+
+@router.get("/investment-indices/{index_name}/performance")
+async def get_index_performance(index_name: str, tier: str = "raw", limit: Optional[int] = None):
+    try:
+        return monitor.get_index_performance(index_name, tier, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/calculate-return")
 async def calculate_return(species: str, amount: float, investment_type: str):
     return {
-        "return": monitor.calculate_investment_return(species, amount, investment_type)
+        "return": await monitor.calculate_investment_return(species, amount, investment_type)
+    }
+
+@router.post("/calculate-returns")
+async def calculate_returns(positions: List[InvestmentPosition]):
+    try:
+        rates = await monitor.calculate_investment_returns(positions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    amounts = np.array([p.amount for p in positions])
+    return {
+        "returns": rates.tolist(),
+        "total_expected_return": float(amounts @ rates)
     }
 
 @router.get("/savings/{profile_id}", response_model=SavingsAccount)
 async def get_savings_account(profile_id: str):
     return monitor.get_savings_account(profile_id)
 
+@router.post("/savings/accrue-interest")
+async def accrue_interest():
+    return monitor.accrue_all_interest()
+
+@router.get("/savings/{profile_id}/projection")
+async def project_savings(profile_id: str, horizon_days: int = Query(365, ge=1, le=MAX_PROJECTION_DAYS)):
+    return monitor.project_savings(profile_id, horizon_days)
+
 @router.post("/savings/{profile_id}/settings")
 async def update_savings_settings(
     profile_id: str,
@@ -433,6 +1236,10 @@ async def update_savings_settings(
 async def get_market_metrics():
     return monitor.update_market_metrics()
 
+@router.post("/savings/rebalance-all")
+async def rebalance_all_portfolios():
+    return monitor.rebalance_all_portfolios()
+
 @router.post("/savings/{profile_id}/rebalance")
 async def rebalance_portfolio(profile_id: str):
     monitor.auto_rebalance_portfolio(profile_id)
@@ -448,17 +1255,45 @@ async def get_community_impact(profile_id: str):
 async def update_community_impact(profile_id: str, impact_data: Dict):
     return monitor.update_community_impact(profile_id, impact_data)
 
+def leaderboard_response(request: Request, board: str, params: Tuple,
+                         build: Callable[[], List[LeaderboardEntry]]) -> Response:
+    """Cached leaderboard body with an ETag; 304 if the client already has it."""
+    body, etag = monitor.cached_leaderboard(board, params, build)
+    if_none_match = request.headers.get("if-none-match", "")
+    known = {tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")}
+    if etag in known or "*" in known:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
 @router.get("/leaderboard/global", response_model=List[LeaderboardEntry])
-async def get_global_leaderboard(limit: int = 100):
-    return monitor.get_global_leaderboard(limit)
+async def get_global_leaderboard(request: Request, limit: int = 100):
+    return leaderboard_response(request, "global", (limit,), lambda: monitor.get_global_leaderboard(limit))
+
+@router.get("/leaderboard/global/{profile_id}", response_model=LeaderboardEntry)
+async def get_global_rank(profile_id: str):
+    entry = monitor.get_global_rank(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return entry
 
 @router.get("/leaderboard/local", response_model=List[LeaderboardEntry])
-async def get_local_leaderboard(lat: float, lon: float, radius_km: float = 50, limit: int = 100):
-    return monitor.get_local_leaderboard({"lat": lat, "lon": lon}, radius_km, limit)
+async def get_local_leaderboard(request: Request, lat: float, lon: float, radius_km: float = 50,
+                                limit: int = 100, precise: bool = False):
+    # Queries snap to a geohash cell so nearby users share cached boards;
+    # distances are measured from the cell's center
+    cell, center = monitor.local_leaderboard_cell(lat, lon, radius_km)
+    return leaderboard_response(request, "local", (cell, radius_km, limit, precise),
+                                lambda: monitor.get_local_leaderboard(center, radius_km, limit, precise))
 
 @router.get("/leaderboard/friends/{profile_id}", response_model=List[LeaderboardEntry])
-async def get_friends_leaderboard(profile_id: str, limit: int = 100):
-    return monitor.get_friends_leaderboard(profile_id, limit)
+async def get_friends_leaderboard(request: Request, profile_id: str, limit: int = 100):
+    return leaderboard_response(request, "friends", (profile_id, limit),
+                                lambda: monitor.get_friends_leaderboard(profile_id, limit))
+
+@router.get("/leaderboard/friends-of-friends/{profile_id}", response_model=List[LeaderboardEntry])
+async def get_friends_of_friends_leaderboard(request: Request, profile_id: str, limit: int = 100):
+    return leaderboard_response(request, "friends-of-friends", (profile_id, limit),
+                                lambda: monitor.get_friends_of_friends_leaderboard(profile_id, limit))
 
 @router.post("/friends/{profile_id}/{friend_id}")
 async def add_friend(profile_id: str, friend_id: str):
@@ -467,6 +1302,11 @@ async def add_friend(profile_id: str, friend_id: str):
         raise HTTPException(status_code=400, detail="Failed to add friend")
     return {"status": "success"}
 
+@router.post("/friends/import")
+async def import_friends(links: List[FriendLink]):
+    counts = monitor.import_friends((link.profile_id, link.friend_id) for link in links)
+    return {"status": "success", **counts}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(router, host="0.0.0.0", port=8001) 
\ No newline at end of file
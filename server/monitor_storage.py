@@ -0,0 +1,315 @@
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Any
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+
+# Persistence for FishHealthMonitor state.
+#
+# Savings accounts are stored as plain column dicts (see SAVINGS_FIELDS),
+# community impacts as JSON documents keyed by profile, and friendships as undirected links stored once per pair.
+# MemoryStorage keeps everything in process; SQLiteStorage persists it so state
+# survives restarts and can be shared by several workers.
+#
+# Every stored row carries a revision that grows with each write, so a worker
+# can pick up what other workers changed by loading rows ``since`` the last
+# revision it saw. Savings accounts are changed with update_savings_accounts,
+# which reads and writes them back in one transaction, so concurrent balance
+# updates are applied on top of each other instead of overwriting each other.
+SAVINGS_FIELDS = ("profile_id", "balance", "interest_rate", "daily_interest", "last_interest_payment",
+                  "safety_threshold", "auto_reinvest", "investment_pots")
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+def _link(profile_id: str, friend_id: str) -> Tuple[str, str]:
+    return (profile_id, friend_id) if profile_id < friend_id else (friend_id, profile_id)
+
+class MonitorStorage(ABC):
+    """Storage interface for monitor state; every write method takes a batch."""
+
+    @abstractmethod
+    def upsert_savings_accounts(self, accounts: Iterable[Dict]):
+        ...
+
+    @abstractmethod
+    def update_savings_accounts(self, modify: Callable[[List[Dict]], Iterable[Dict]],
+                                profile_id: Optional[str] = None):
+        """Read one account (or all of them), pass the records to ``modify`` and
+        store the records it returns, all in one transaction."""
+
+    @abstractmethod
+    def load_savings_accounts(self, since: int = 0) -> Iterator[Dict]:
+        """Accounts written after revision ``since``, each with its ``revision``."""
+
+    @abstractmethod
+    def upsert_community_impacts(self, impacts: Iterable[Tuple[str, str]]):
+        """Store ``(profile_id, json_document)`` rows."""
+
+    @abstractmethod
+    def get_community_impact(self, profile_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def load_community_impacts(self, since: int = 0) -> Iterator[Tuple[str, str, int]]:
+        """``(profile_id, json_document, revision)`` written after revision ``since``."""
+
+    @abstractmethod
+    def add_friend_links(self, links: Iterable[Tuple[str, str]]):
+        ...
+
+    @abstractmethod
+    def load_friend_links(self, since: int = 0) -> Iterator[Tuple[str, str, int]]:
+        """``(profile_id, friend_id, revision)`` added after revision ``since``."""
+
+    @abstractmethod
+    def data_version(self) -> int:
+        """Changes whenever another writer may have changed the stored state."""
+
+    def close(self):
+        pass
+
+class MemoryStorage(MonitorStorage):
+    """In-process storage; state is lost when the process exits."""
+
+    def __init__(self):
+        self.revision = 0
+        self.lock = threading.Lock()
+        self.savings_accounts: Dict[str, Dict] = {}
+        self.community_impacts: Dict[str, Tuple[str, int]] = {}
+        self.friend_links: Dict[Tuple[str, str], int] = {}
+
+    def _next_revision(self) -> int:
+        self.revision += 1
+        return self.revision
+
+    def upsert_savings_accounts(self, accounts: Iterable[Dict]):
+        with self.lock:
+            for account in accounts:
+                self.savings_accounts[account["profile_id"]] = {**account, "revision": self._next_revision()}
+
+    def update_savings_accounts(self, modify: Callable[[List[Dict]], Iterable[Dict]],
+                                profile_id: Optional[str] = None):
+        with self.lock:
+            if profile_id is None:
+                current = list(self.savings_accounts.values())
+            else:
+                current = [self.savings_accounts[profile_id]] if profile_id in self.savings_accounts else []
+            for account in modify([dict(account) for account in current]):
+                self.savings_accounts[account["profile_id"]] = {**account, "revision": self._next_revision()}
+
+    def load_savings_accounts(self, since: int = 0) -> Iterator[Dict]:
+        with self.lock:
+            return iter([dict(account) for account in self.savings_accounts.values() if account["revision"] > since])
+
+    def upsert_community_impacts(self, impacts: Iterable[Tuple[str, str]]):
+        with self.lock:
+            for profile_id, document in impacts:
+                self.community_impacts[profile_id] = (document, self._next_revision())
+
+    def get_community_impact(self, profile_id: str) -> Optional[str]:
+        stored = self.community_impacts.get(profile_id)
+        return None if stored is None else stored[0]
+
+    def load_community_impacts(self, since: int = 0) -> Iterator[Tuple[str, str, int]]:
+        with self.lock:
+            return iter([(profile_id, document, revision)
+                         for profile_id, (document, revision) in self.community_impacts.items() if revision > since])
+
+    def add_friend_links(self, links: Iterable[Tuple[str, str]]):
+        with self.lock:
+            for link in links:
+                link = _link(*link)
+                if link not in self.friend_links:
+                    self.friend_links[link] = self._next_revision()
+
+    def load_friend_links(self, since: int = 0) -> Iterator[Tuple[str, str, int]]:
+        with self.lock:
+            return iter([link + (revision,) for link, revision in self.friend_links.items() if revision > since])
+
+    def data_version(self) -> int:
+        return self.revision
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS savings_accounts (
+    profile_id TEXT PRIMARY KEY,
+    balance REAL NOT NULL,
+    interest_rate REAL NOT NULL,
+    daily_interest REAL NOT NULL,
+    last_interest_payment TEXT NOT NULL,
+    safety_threshold REAL NOT NULL,
+    auto_reinvest INTEGER NOT NULL,
+    investment_pots TEXT NOT NULL,
+    revision INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS savings_accounts_revision ON savings_accounts (revision);
+CREATE TABLE IF NOT EXISTS community_impacts (
+    profile_id TEXT PRIMARY KEY,
+    document TEXT NOT NULL,
+    revision INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS community_impacts_revision ON community_impacts (revision);
+CREATE TABLE IF NOT EXISTS friend_links (
+    profile_id TEXT NOT NULL,
+    friend_id TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    PRIMARY KEY (profile_id, friend_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS friend_links_friend ON friend_links (friend_id);
+CREATE INDEX IF NOT EXISTS friend_links_revision ON friend_links (revision);
+"""
+
+# Statements are fixed strings so sqlite3's per-connection statement cache
+# prepares each of them once. Writers are serialized by SQLite, so the next
+# revision of a table is one past its current maximum.
+def _next_revision(table: str) -> str:
+    return f"(SELECT COALESCE(MAX(revision), 0) + 1 FROM {table})"
+
+UPSERT_SAVINGS = """
+INSERT INTO savings_accounts ({columns}, revision) VALUES ({values}, {revision})
+ON CONFLICT (profile_id) DO UPDATE SET {updates}, revision = excluded.revision
+""".format(
+    columns=", ".join(SAVINGS_FIELDS),
+    values=", ".join(":" + field for field in SAVINGS_FIELDS),
+    revision=_next_revision("savings_accounts"),
+    updates=", ".join(f"{field} = excluded.{field}" for field in SAVINGS_FIELDS[1:])
+)
+SELECT_SAVINGS = f"SELECT {', '.join(SAVINGS_FIELDS)}, revision FROM savings_accounts"
+SELECT_SAVINGS_SINCE = SELECT_SAVINGS + " WHERE revision > ?"
+SELECT_ACCOUNT = SELECT_SAVINGS + " WHERE profile_id = ?"
+UPSERT_IMPACT = f"""
+INSERT INTO community_impacts (profile_id, document, revision) VALUES (?, ?, {_next_revision("community_impacts")})
+ON CONFLICT (profile_id) DO UPDATE SET document = excluded.document, revision = excluded.revision
+"""
+SELECT_IMPACT = "SELECT document FROM community_impacts WHERE profile_id = ?"
+SELECT_IMPACTS_SINCE = "SELECT profile_id, document, revision FROM community_impacts WHERE revision > ?"
+INSERT_LINK = f"""
+INSERT OR IGNORE INTO friend_links (profile_id, friend_id, revision) VALUES (?, ?, {_next_revision("friend_links")})
+"""
+SELECT_LINKS_SINCE = "SELECT profile_id, friend_id, revision FROM friend_links WHERE revision > ?"
+
+class SQLiteStorage(MonitorStorage):
+    """Embedded SQLite storage in WAL mode, so readers never block the writer.
+
+    Several processes may open the same file; update_savings_accounts takes
+    SQLite's write lock before reading, so read-modify-write cycles of
+    different workers never interleave.
+    """
+
+    def __init__(self, path: str, fetch_size: int = 500):
+        self.fetch_size = fetch_size
+        self.connection = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+
+    def _write_many(self, statement: str, rows: Iterable):
+        with self.lock, self.connection:
+            self.connection.executemany(statement, rows)
+
+    def _read(self, statement: str, params: Tuple = ()) -> List[Tuple]:
+        with self.lock:
+            return self.connection.execute(statement, params).fetchall()
+
+    def _stream(self, statement: str, params: Tuple = ()) -> Iterator[Tuple]:
+        """Yield rows in ``fetch_size`` batches, holding the lock only while fetching."""
+        with self.lock:
+            cursor = self.connection.execute(statement, params)
+        try:
+            while True:
+                with self.lock:
+                    rows = cursor.fetchmany(self.fetch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _account_row(account: Dict) -> Dict:
+        return {**account, "investment_pots": json.dumps(account["investment_pots"]),
+                "auto_reinvest": int(account["auto_reinvest"])}
+
+    @staticmethod
+    def _account(row: Tuple) -> Dict:
+        account = dict(zip(SAVINGS_FIELDS + ("revision",), row))
+        account["auto_reinvest"] = bool(account["auto_reinvest"])
+        account["investment_pots"] = json.loads(account["investment_pots"])
+        return account
+
+    def upsert_savings_accounts(self, accounts: Iterable[Dict]):
+        self._write_many(UPSERT_SAVINGS, (self._account_row(account) for account in accounts))
+
+    def update_savings_accounts(self, modify: Callable[[List[Dict]], Iterable[Dict]],
+                                profile_id: Optional[str] = None):
+        with self.lock:
+            # IMMEDIATE takes the database write lock up front, so no other
+            # worker can change the rows between our read and our write
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                if profile_id is None:
+                    rows = self.connection.execute(SELECT_SAVINGS).fetchall()
+                else:
+                    rows = self.connection.execute(SELECT_ACCOUNT, (profile_id,)).fetchall()
+                updated = modify([self._account(row) for row in rows])
+                self.connection.executemany(UPSERT_SAVINGS, (self._account_row(account) for account in updated))
+            except BaseException:
+                self.connection.rollback()
+                raise
+            self.connection.commit()
+
+    def load_savings_accounts(self, since: int = 0) -> Iterator[Dict]:
+        for row in self._stream(SELECT_SAVINGS_SINCE, (since,)):
+            yield self._account(row)
+
+    def upsert_community_impacts(self, impacts: Iterable[Tuple[str, str]]):
+        self._write_many(UPSERT_IMPACT, impacts)
+
+    def get_community_impact(self, profile_id: str) -> Optional[str]:
+        rows = self._read(SELECT_IMPACT, (profile_id,))
+        return rows[0][0] if rows else None
+
+    def load_community_impacts(self, since: int = 0) -> Iterator[Tuple[str, str, int]]:
+        return self._stream(SELECT_IMPACTS_SINCE, (since,))
+
+    def add_friend_links(self, links: Iterable[Tuple[str, str]]):
+        self._write_many(INSERT_LINK, (_link(*link) for link in links))
+
+    def load_friend_links(self, since: int = 0) -> Iterator[Tuple[str, str, int]]:
+        return self._stream(SELECT_LINKS_SINCE, (since,))
+
+    def data_version(self) -> int:
+        # SQLite bumps data_version when another connection commits
+        return self._read("PRAGMA data_version")[0][0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
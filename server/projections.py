@@ -0,0 +1,62 @@
+from typing import Dict, Optional, Sequence
+from collections import OrderedDict
+import numpy as np
+
+# Monte Carlo projection of portfolio growth.
+#
+# Per-step index log returns are modelled as multivariate normal, so the total
+# log return of every index over a horizon is one correlated draw per path.
+# The resulting growth factors are shared by every allocation: projecting a
+# batch of allocation vectors is a single (allocations x indices) @
+# (indices x paths) matrix product.
+PERCENTILES = (5, 25, 50, 75, 95)
+
+class MonteCarloProjector:
+    """Simulated index growth paths for projecting allocation outcomes."""
+
+    def __init__(self, paths: int = 10000, seed: Optional[int] = None, max_horizons: int = 8):
+        self.paths = paths
+        self.seed = seed
+        self.mean = np.zeros(0)
+        self.cov = np.zeros((0, 0))
+        # Each horizon holds a (paths, indices) array, so only the most
+        # recently used few are kept
+        self.max_horizons = max_horizons
+        self._growth: "OrderedDict[int, np.ndarray]" = OrderedDict()
+
+    def set_parameters(self, mean: Sequence[float], cov: np.ndarray):
+        """Per-step log-return mean vector and covariance matrix of the indices."""
+        self.mean = np.asarray(mean, dtype=float)
+        self.cov = np.asarray(cov, dtype=float)
+        self._growth.clear()
+
+    def growth(self, steps: int) -> np.ndarray:
+        """(paths, indices) growth factors over ``steps`` steps, drawn once per horizon."""
+        if steps < 1:
+            raise ValueError(f"Projection horizon must be at least one step, got {steps}")
+        if steps in self._growth:
+            self._growth.move_to_end(steps)
+        else:
+            rng = np.random.default_rng(self.seed)
+            # Sums of i.i.d. normal steps are normal with mean and covariance scaled by steps
+            log_returns = rng.multivariate_normal(self.mean * steps, self.cov * steps,
+                                                  size=self.paths, method="eigh")
+            self._growth[steps] = np.exp(log_returns)
+            while len(self._growth) > self.max_horizons:
+                self._growth.popitem(last=False)
+        return self._growth[steps]
+
+    def project(self, allocations: np.ndarray, cash_growth: np.ndarray, steps: int) -> Dict[str, np.ndarray]:
+        """Distribution of the growth of a unit balance for each allocation row.
+
+        ``allocations`` is (n, indices); the unallocated remainder of each row
+        grows deterministically by ``cash_growth``.
+        """
+        allocations = np.atleast_2d(np.asarray(allocations, dtype=float))
+        cash = np.clip(1 - allocations.sum(axis=1), 0, None)
+        outcomes = allocations @ self.growth(steps).T + (cash * np.asarray(cash_growth))[:, None]
+        return {
+            "percentiles": np.percentile(outcomes, PERCENTILES, axis=1).T,
+            "mean": outcomes.mean(axis=1),
+            "loss_probability": (outcomes < 1).mean(axis=1)
+        }
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+
+@dataclass(frozen=True)
+class Snapshot:
+    sequence: int
+    taken_at: datetime
+    body: bytes  # pre-serialized JSON
+
+class SimulationEngine:
+    """Steps the simulations on a fixed schedule and publishes read snapshots.
+
+    Each tick runs every registered step, then renders every view once and
+    serializes it to JSON. The whole dict of snapshots is replaced in one
+    assignment, so readers always see a consistent tick without locking and
+    reads never advance the simulation.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self.tick_seconds = tick_seconds
+        self.steps: List[Callable[[], None]] = []
+        self.views: Dict[str, Callable[[], object]] = {}
+        self.snapshots: Dict[str, Snapshot] = {}
+        self.sequence = 0
+        self.task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger(__name__)
+
+    def add_step(self, step: Callable[[], None]):
+        self.steps.append(step)
+
+    def add_view(self, name: str, render: Callable[[], object]):
+        self.views[name] = render
+
+    def snapshot(self, name: str) -> Snapshot:
+        snapshots = self.snapshots
+        if name not in snapshots:
+            # Nothing published yet (e.g. before the first tick)
+            self.publish()
+            snapshots = self.snapshots
+        return snapshots[name]
+
+    def publish(self, *names: str):
+        """Re-render the named views (all by default) and swap them in.
+
+        Call after out-of-tick mutations so reads reflect them right away.
+        """
+        taken_at = datetime.now()
+        snapshots = dict(self.snapshots)
+        for name in names or self.views:
+            try:
+                body = json.dumps(self.views[name]()).encode("utf-8")
+            except Exception:
+                # Keep serving the previous snapshot of a view that fails to render
+                self.logger.exception("Rendering view %s failed", name)
+                continue
+            snapshots[name] = Snapshot(self.sequence, taken_at, body)
+        self.snapshots = snapshots
+
+    def tick(self):
+        """Run every step, then publish; a failing step does not stop the others."""
+        for step in self.steps:
+            try:
+                step()
+            except Exception:
+                self.logger.exception("Simulation step %r failed", step)
+        self.sequence += 1
+        self.publish()
+
+    async def run(self):
+        while True:
+            try:
+                self.tick()
+            except Exception:
+                self.logger.exception("Simulation tick failed")
+            await asyncio.sleep(self.tick_seconds)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
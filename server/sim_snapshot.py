@@ -0,0 +1,63 @@
+from typing import Dict, Tuple
+import json
+
+import numpy as np
+
+# File layout: MAGIC, 8-byte little-endian header length, JSON header, then each
+# column as raw bytes starting on an ALIGNMENT boundary. The header records
+# every column's dtype, shape and offset so columns can be memory-mapped
+# straight from disk.
+MAGIC = b"UAVSNAP1"
+ALIGNMENT = 64
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def write_snapshot(path: str, header: Dict, columns: Dict[str, np.ndarray]):
+    """Write scalar ``header`` fields and named array ``columns`` to ``path``."""
+    columns = {name: np.ascontiguousarray(array) for name, array in columns.items()}
+    layout = {}
+    offset = 0
+    for name, array in columns.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+
+    encoded = json.dumps({"header": header, "columns": layout}).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(encoded))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, array in columns.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+def read_snapshot(path: str, mmap_mode: str = "c") -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Read a snapshot back as ``(header, columns)``.
+
+    With the default copy-on-write ``mmap_mode`` columns are mapped from the
+    file, so processes loading the same snapshot share its pages until they
+    modify them. Pass ``mmap_mode=None`` to read everything into memory.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a UAV simulator snapshot")
+        length = int.from_bytes(f.read(8), "little")
+        meta = json.loads(f.read(length).decode("utf-8"))
+    data_start = _align(len(MAGIC) + 8 + length)
+
+    columns = {}
+    for name, spec in meta["columns"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        offset = data_start + spec["offset"]
+        if mmap_mode is None or int(np.prod(shape)) == 0:
+            count = int(np.prod(shape))
+            with open(path, "rb") as f:
+                f.seek(offset)
+                columns[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+        else:
+            columns[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape)
+    return meta["header"], columns
@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import struct
+
+import numpy as np
+
+from detection_tracker import DetectionEvent, ENTERED, MOVED, LEFT
+from uav_simulator import FishPopulation
+
+# Binary /ws/uav telemetry, negotiated with the "uav-telemetry.v1" subprotocol.
+#
+# Every frame starts with HEADER: version, flags, sequence number and a bitmask
+# of the status fields that follow. A keyframe carries every status field, the
+# species table and every detected fish; a delta frame only carries the status
+# fields whose quantized value changed plus entered/moved/left detection events.
+# Unchanged telemetry therefore costs a few header bytes per frame.
+SUBPROTOCOL = "uav-telemetry.v1"
+VERSION = 1
+
+FLAG_KEYFRAME = 0x01
+FLAG_OPERATIONAL = 0x02
+FLAG_STRING_IDS = 0x04
+
+HEADER = struct.Struct("<BBIH")
+COUNT = struct.Struct("<I")
+
+# (name, struct code, scale) of the quantized status fields, in mask bit order.
+# Water quality is an unclamped random walk and can go negative, so those
+# fields are signed; quantize_status saturates anything past a field's range.
+STATUS_FIELDS = [
+    ("lat", "i", 1e7),
+    ("lon", "i", 1e7),
+    ("alt", "i", 100),
+    ("battery_level", "H", 10000),
+    ("temperature", "h", 100),
+    ("ph", "h", 1000),
+    ("oxygen", "h", 100),
+    ("salinity", "h", 100),
+    ("turbidity", "h", 100),
+    ("last_maintenance", "I", 1),
+]
+
+def _field_range(code: str) -> Tuple[int, int]:
+    bits = struct.calcsize("<" + code) * 8
+    if code.islower():
+        return -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+    return 0, (1 << bits) - 1
+
+FIELD_RANGES = [_field_range(code) for _, code, _ in STATUS_FIELDS]
+
+EVENT_CODES = {ENTERED: 0, MOVED: 1}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+FISH_RECORD = np.dtype([
+    ("event", "u1"),
+    ("row", "<u4"),
+    ("lat", "<i4"),  # 1e-7 degrees
+    ("lon", "<i4"),  # 1e-7 degrees
+    ("alt", "<i4"),  # centimetres
+    ("size", "<u2"),  # millimetres
+    ("species", "u1"),
+])
+
+def quantize_status(status: Dict, last_maintenance: float) -> Tuple[int, ...]:
+    """Fixed-point status values in STATUS_FIELDS order, saturated to each field's range."""
+    values = {**status["position"], **status["water_quality"],
+              "battery_level": status["battery_level"], "last_maintenance": last_maintenance}
+    return tuple(
+        min(max(int(round(values[name] * scale)), low), high)
+        for (name, _, scale), (low, high) in zip(STATUS_FIELDS, FIELD_RANGES)
+    )
+
+def _pack_ids(ids: Sequence[str]) -> bytes:
+    parts = []
+    for fish_id in ids:
+        encoded = fish_id.encode("utf-8")[:255]
+        parts.append(bytes([len(encoded)]) + encoded)
+    return b"".join(parts)
+
+def _unpack_ids(data: bytes, offset: int, count: int) -> Tuple[List[str], int]:
+    ids = []
+    for _ in range(count):
+        length = data[offset]
+        ids.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    return ids, offset
+
+def _fish_records(population: FishPopulation, rows: np.ndarray, event_codes: np.ndarray) -> np.ndarray:
+    records = np.empty(len(rows), dtype=FISH_RECORD)
+    records["event"] = event_codes
+    records["row"] = rows
+    records["lat"] = np.round(population.lat[rows] * 1e7)
+    records["lon"] = np.round(population.lon[rows] * 1e7)
+    records["alt"] = np.round(population.alt[rows] * 100)
+    records["size"] = np.round(population.size[rows] * 1000)
+    records["species"] = population.species_code[rows]
+    return records
+
+def encode_frame(sequence: int,
+                 status: Tuple[int, ...],
+                 is_operational: bool,
+                 population: FishPopulation,
+                 previous_status: Optional[Tuple[int, ...]] = None,
+                 events: Sequence[DetectionEvent] = (),
+                 detected_rows: Optional[np.ndarray] = None) -> bytes:
+    """Encode a keyframe (``previous_status`` is None) or a delta frame.
+
+    Keyframes list ``detected_rows`` as entered fish; delta frames encode
+    ``events`` instead.
+    """
+    keyframe = previous_status is None
+    string_ids = population.ids is not None
+    flags = ((FLAG_KEYFRAME if keyframe else 0) |
+             (FLAG_OPERATIONAL if is_operational else 0) |
+             (FLAG_STRING_IDS if string_ids else 0))
+
+    mask = 0
+    fields = []
+    for bit, ((_, code, _), value) in enumerate(zip(STATUS_FIELDS, status)):
+        if keyframe or value != previous_status[bit]:
+            mask |= 1 << bit
+            fields.append(struct.pack("<" + code, value))
+    parts = [HEADER.pack(VERSION, flags, sequence & 0xFFFFFFFF, mask)] + fields
+
+    if keyframe:
+        parts.append(bytes([len(population.species_names)]))
+        parts.append(_pack_ids(population.species_names))
+        rows = np.asarray(detected_rows if detected_rows is not None else [], dtype=np.int64)
+        codes = np.full(len(rows), EVENT_CODES[ENTERED])
+        left: List[DetectionEvent] = []
+    else:
+        shown = [e for e in events if e.type != LEFT]
+        left = [e for e in events if e.type == LEFT]
+        rows = np.array([e.row for e in shown], dtype=np.int64)
+        codes = np.array([EVENT_CODES[e.type] for e in shown], dtype=np.uint8)
+
+    parts.append(COUNT.pack(len(rows)))
+    parts.append(_fish_records(population, rows, codes).tobytes())
+    if string_ids:
+        parts.append(_pack_ids(population.ids[row] for row in rows))
+
+    parts.append(COUNT.pack(len(left)))
+    if string_ids:
+        parts.append(_pack_ids(e.fish_id for e in left))
+    else:
+        parts.append(np.array([e.row for e in left], dtype="<u4").tobytes())
+    return b"".join(parts)
+
+def decode_frame(data: bytes, species_names: Optional[List[str]] = None) -> Dict:
+    """Reference decoder; returns the raw (still quantized) frame contents.
+
+    ``species_names`` is the table from the last keyframe and is needed to name
+    fish in delta frames.
+    """
+    version, flags, sequence, mask = HEADER.unpack_from(data, 0)
+    if version != VERSION:
+        raise ValueError(f"Unsupported telemetry frame version {version}")
+    offset = HEADER.size
+
+    status = {}
+    for bit, (name, code, scale) in enumerate(STATUS_FIELDS):
+        if mask & (1 << bit):
+            (value,) = struct.unpack_from("<" + code, data, offset)
+            status[name] = value / scale
+            offset += struct.calcsize("<" + code)
+
+    keyframe = bool(flags & FLAG_KEYFRAME)
+    if keyframe:
+        count = data[offset]
+        species_names, offset = _unpack_ids(data, offset + 1, count)
+
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    records = np.frombuffer(data, dtype=FISH_RECORD, count=count, offset=offset)
+    offset += records.nbytes
+    if flags & FLAG_STRING_IDS:
+        ids, offset = _unpack_ids(data, offset, count)
+    else:
+        ids = [f"fish_{row}" for row in records["row"]]
+
+    (left_count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    if flags & FLAG_STRING_IDS:
+        left, offset = _unpack_ids(data, offset, left_count)
+    else:
+        left_rows = np.frombuffer(data, dtype="<u4", count=left_count, offset=offset)
+        left = [f"fish_{row}" for row in left_rows]
+
+    fish = [
+        {
+            "event": EVENT_NAMES[int(record["event"])],
+            "id": fish_id,
+            "position": {
+                "lat": record["lat"] / 1e7,
+                "lon": record["lon"] / 1e7,
+                "alt": record["alt"] / 100
+            },
+            "species": species_names[record["species"]] if species_names else int(record["species"]),
+            "size": record["size"] / 1000
+        }
+        for record, fish_id in zip(records, ids)
+    ]
+    return {
+        "keyframe": keyframe,
+        "sequence": sequence,
+        "is_operational": bool(flags & FLAG_OPERATIONAL),
+        "status": status,
+        "species_names": species_names if keyframe else None,
+        "fish": fish,
+        "left": left
+    }
@@ -0,0 +1,183 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+import math
+import time
+
+import numpy as np
+
+# Bounded time series for metrics that are sampled forever.
+#
+# Recent samples sit in a fixed-size raw ring buffer. Every sample is also
+# folded into coarser tiers (minute, hour and day by default) that keep the mean
+# of each bucket in their own ring buffers, so memory stays flat while long
+# ranges remain queryable. Mean, volatility and trend over the raw window are
+# maintained incrementally as samples arrive and fall out.
+DEFAULT_TIERS = (("minute", 60, 1440), ("hour", 3600, 720), ("day", 86400, 730))
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value) buffer that overwrites its oldest sample."""
+
+    def __init__(self, capacity: int):
+        self.times = np.zeros(capacity)
+        self.values = np.zeros(capacity)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp: float, value: float) -> Optional[float]:
+        """Store a sample; returns the value it displaced, if the buffer was full."""
+        capacity = len(self.values)
+        evicted = None
+        if self.count == capacity:
+            slot = self.start
+            evicted = float(self.values[slot])
+            self.start = (self.start + 1) % capacity
+        else:
+            slot = (self.start + self.count) % capacity
+            self.count += 1
+        self.times[slot] = timestamp
+        self.values[slot] = value
+        return evicted
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        if not self.count:
+            return None
+        slot = (self.start + self.count - 1) % len(self.values)
+        return float(self.times[slot]), float(self.values[slot])
+
+    def arrays(self, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Chronological copies of the newest ``limit`` (default all) samples."""
+        count = self.count if limit is None else min(max(limit, 0), self.count)
+        order = (self.start + np.arange(self.count - count, self.count)) % len(self.values)
+        return self.times[order], self.values[order]
+
+class Tier:
+    """Per-bucket means of a series at a fixed resolution."""
+
+    def __init__(self, bucket_seconds: float, capacity: int):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = RingBuffer(capacity)
+        self.open_start: Optional[float] = None
+        self.open_sum = 0.0
+        self.open_count = 0
+
+    def add(self, timestamp: float, value: float):
+        bucket = math.floor(timestamp / self.bucket_seconds) * self.bucket_seconds
+        if self.open_start is not None and bucket != self.open_start:
+            self.buckets.append(self.open_start, self.open_sum / self.open_count)
+            self.open_sum = 0.0
+            self.open_count = 0
+        self.open_start = bucket
+        self.open_sum += value
+        self.open_count += 1
+
+    def arrays(self, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Closed buckets plus the still-open one, oldest first."""
+        if self.open_start is None or limit == 0:
+            return self.buckets.arrays(limit)
+        closed = None if limit is None else limit - 1
+        times, values = self.buckets.arrays(closed)
+        return (np.append(times, self.open_start),
+                np.append(values, self.open_sum / self.open_count))
+
+class TimeSeries:
+    """Raw ring buffer, downsampling tiers and rolling statistics for one metric."""
+
+    def __init__(self, raw_capacity: int = 1440,
+                 tiers: Sequence[Tuple[str, float, int]] = DEFAULT_TIERS,
+                 clock: Callable[[], float] = time.time):
+        self.raw = RingBuffer(raw_capacity)
+        self.tiers: Dict[str, Tier] = {name: Tier(seconds, capacity) for name, seconds, capacity in tiers}
+        self.clock = clock
+        self._appends = 0
+        self._recompute()
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def _recompute(self):
+        """Rebuild the running sums from the buffer to shed floating point drift."""
+        _, values = self.raw.arrays()
+        positions = np.arange(len(values), dtype=float)
+        self._sum = float(values.sum())
+        self._sum_squares = float((values * values).sum())
+        self._sum_x = float(positions.sum())
+        self._sum_xx = float((positions * positions).sum())
+        self._sum_xv = float((positions * values).sum())
+
+    def append(self, value: float, timestamp: Optional[float] = None):
+        timestamp = self.clock() if timestamp is None else timestamp
+        evicted = self.raw.append(timestamp, value)
+
+        # Running sums treat the oldest raw sample as position 0, so evicting it
+        # shifts every remaining position down by one
+        n = len(self.raw) - 1
+        if evicted is not None:
+            self._sum -= evicted
+            self._sum_squares -= evicted * evicted
+            self._sum_xx -= 2 * self._sum_x - n
+            self._sum_x -= n
+            self._sum_xv -= self._sum
+        self._sum += value
+        self._sum_squares += value * value
+        self._sum_x += n
+        self._sum_xx += n * n
+        self._sum_xv += n * value
+
+        for tier in self.tiers.values():
+            tier.add(timestamp, value)
+
+        self._appends += 1
+        if self._appends % len(self.raw.values) == 0:
+            self._recompute()
+
+    def last(self) -> Optional[float]:
+        latest = self.raw.last()
+        return None if latest is None else latest[1]
+
+    @property
+    def mean(self) -> float:
+        return self._sum / len(self.raw) if len(self.raw) else 0.0
+
+    @property
+    def volatility(self) -> float:
+        """Standard deviation of the raw window."""
+        if not len(self.raw):
+            return 0.0
+        return math.sqrt(max(self._sum_squares / len(self.raw) - self.mean ** 2, 0.0))
+
+    @property
+    def slope(self) -> float:
+        """Least-squares change per sample across the raw window."""
+        n = len(self.raw)
+        denominator = n * self._sum_xx - self._sum_x ** 2
+        if n < 2 or denominator <= 0:
+            return 0.0
+        return (n * self._sum_xv - self._sum_x * self._sum) / denominator
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": len(self.raw),
+            "last": self.last(),
+            "mean": self.mean,
+            "volatility": self.volatility,
+            "slope": self.slope
+        }
+
+    def arrays(self, tier: str = "raw", limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values) of ``tier``, oldest first."""
+        if tier == "raw":
+            return self.raw.arrays(limit)
+        if tier not in self.tiers:
+            raise ValueError(f"Unknown tier '{tier}'")
+        return self.tiers[tier].arrays(limit)
+
+    def records(self, value_key: str, tier: str = "raw", limit: Optional[int] = None) -> List[Dict]:
+        """Samples as ``{"timestamp": iso8601, value_key: value}`` dicts."""
+        times, values = self.arrays(tier, limit)
+        return [
+            {"timestamp": datetime.fromtimestamp(t).isoformat(), value_key: float(v)}
+            for t, v in zip(times, values)
+        ]
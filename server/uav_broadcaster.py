@@ -0,0 +1,125 @@
+from typing import Callable, Dict, Optional, Set, Tuple
+import asyncio
+import json
+
+from uav_simulator import UAVSimulator
+from detection_tracker import DetectionTracker
+from telemetry_codec import encode_frame, quantize_status
+
+FULL = "full"
+DELTA = "delta"
+BINARY = "binary"
+
+class UAVBroadcaster:
+    """Fans one simulator's frames out to all /ws/uav clients.
+
+    ``publish`` runs once per simulation tick (as a SimulationEngine step, after
+    the step that scans with ``uav.scan``) and serializes each frame kind (full or delta) once, no matter how many clients
+    are connected. Every client reads from its own bounded queue; when a slow
+    client falls behind its oldest frame is dropped so it never holds up the
+    others.
+
+    Binary subscribers get keyframe-plus-delta frames (see telemetry_codec).
+    A binary client that overflows cannot apply later deltas, so its queue is
+    flushed and it is resynchronized with a keyframe on the next tick.
+    """
+
+    def __init__(self, uav: UAVSimulator, tracker: DetectionTracker,
+                 serialize_fish: Callable, serialize_event: Callable,
+                 queue_size: int = 8, keyframe_interval: int = 30):
+        self.uav = uav
+        self.tracker = tracker
+        self.serialize_fish = serialize_fish
+        self.serialize_event = serialize_event
+        self.queue_size = queue_size
+        self.keyframe_interval = keyframe_interval
+        self.subscribers: Dict[asyncio.Queue, str] = {}
+        self.resync: Set[asyncio.Queue] = set()
+        self.sequence = 0
+        self.previous_status: Optional[Tuple[int, ...]] = None
+        self.published_scan_id: Optional[int] = None
+        self.dropped_frames = 0
+
+    def subscribe(self, mode: str = FULL) -> asyncio.Queue:
+        if mode not in (FULL, DELTA, BINARY):
+            raise ValueError(f"Unknown frame mode: {mode}")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if mode == DELTA and len(self.tracker.indices):
+            # Late joiners first get everything currently in range
+            queue.put_nowait(json.dumps({
+                "status": self.uav.get_status(),
+                "detection_events": [self.serialize_event(e) for e in self.tracker.current()]
+            }))
+        elif mode == BINARY:
+            self.resync.add(queue)
+        self.subscribers[queue] = mode
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.pop(queue, None)
+        self.resync.discard(queue)
+
+    def publish(self):
+        if not self.subscribers:
+            return
+
+        status = self.uav.get_status()
+        population = self.uav.fish_population
+        # The scan itself is a separate engine step; only consume a scan once
+        indices = None
+        if self.uav.scan_id != self.published_scan_id:
+            indices = self.uav.detected_rows
+            self.published_scan_id = self.uav.scan_id
+        events = [] if indices is None else self.tracker.update(population, indices)
+
+        frames = {}
+        modes = set(self.subscribers.values())
+        if FULL in modes:
+            detected_fish = [] if indices is None else population.view(indices)
+            frames[FULL] = json.dumps({
+                "status": status,
+                "detected_fish": [self.serialize_fish(fish) for fish in detected_fish]
+            })
+        if DELTA in modes:
+            frames[DELTA] = json.dumps({
+                "status": status,
+                "detection_events": [self.serialize_event(event) for event in events]
+            })
+
+        keyframe = None
+        if BINARY in modes:
+            quantized = quantize_status(status, self.uav.status.last_maintenance.timestamp())
+            operational = self.uav.status.is_operational
+            detected_rows = self.tracker.indices if self.tracker.population is population else []
+            if self.previous_status is None or self.sequence % self.keyframe_interval == 0:
+                frames[BINARY] = keyframe = encode_frame(
+                    self.sequence, quantized, operational, population, detected_rows=detected_rows
+                )
+            else:
+                frames[BINARY] = encode_frame(
+                    self.sequence, quantized, operational, population, self.previous_status, events
+                )
+            if self.resync and keyframe is None:
+                keyframe = encode_frame(
+                    self.sequence, quantized, operational, population, detected_rows=detected_rows
+                )
+            self.previous_status = quantized
+            self.sequence += 1
+
+        for queue, mode in list(self.subscribers.items()):
+            if mode == BINARY and queue in self.resync:
+                self.resync.discard(queue)
+                self._offer(queue, keyframe, mode)
+            else:
+                self._offer(queue, frames[mode], mode)
+
+    def _offer(self, queue: asyncio.Queue, frame, mode: str):
+        if queue.full():
+            self.dropped_frames += 1
+            if mode == BINARY:
+                while not queue.empty():
+                    queue.get_nowait()
+                self.resync.add(queue)
+                return
+            queue.get_nowait()
+        queue.put_nowait(frame)
@@ -0,0 +1,99 @@
+from typing import List, Dict, Optional, Sequence
+from datetime import datetime
+
+import numpy as np
+
+from uav_simulator import FenceSet, FishFinder, FishPopulation, Fish, GPSFence, GPSPoint, WallClock
+
+# Column order of UAVFleet.water_quality
+WATER_QUALITY_FIELDS = ["temperature", "ph", "oxygen", "salinity", "turbidity"]
+
+class UAVFleet:
+    """Many UAVs sharing one fish population, fence and fish finder.
+
+    Per-UAV state is held in arrays indexed by fleet slot, so a tick drains
+    batteries, drifts water quality, checks the fence and scans for fish for the
+    whole fleet at once instead of looping over UAVSimulator instances.
+    """
+
+    def __init__(self, size: int = 100, fish_count: int = 50,
+                 fences: Optional[Sequence] = None, detection_range_meters: float = 50,
+                 clock=None, seed: Optional[int] = None):
+        self.clock = clock or WallClock()
+        self.rng = np.random.default_rng(seed)
+        self.ids = [f"uav_{i}" for i in range(size)]
+        self.index = {uav_id: i for i, uav_id in enumerate(self.ids)}
+
+        self.lat = np.zeros(size)
+        self.lon = np.zeros(size)
+        self.alt = np.zeros(size)
+        self.battery_level = np.ones(size)
+        self.water_quality = np.tile([25.0, 7.0, 8.0, 35.0, 1.0], (size, 1))
+        self.is_operational = np.ones(size, dtype=bool)
+        self.last_maintenance = np.full(size, self.clock.now().timestamp())
+
+        # The operating area is the union of every circle and polygon fence
+        self.fence = FenceSet(fences or [GPSFence(center=GPSPoint(0.0, 0.0, 0.0), radius_meters=1000)])
+        self.fish_finder = FishFinder(detection_range_meters=detection_range_meters, clock=self.clock)
+        self.fish_population = FishPopulation.random(fish_count, self.rng, now=self.clock.now())
+        self.detections: List[np.ndarray] = [np.empty(0, dtype=np.int64) for _ in range(size)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def slot(self, uav_id: str) -> int:
+        return self.index[uav_id]
+
+    def update_status(self):
+        n = len(self)
+
+        # Simulate battery drain
+        self.battery_level = np.maximum(0.0, self.battery_level - 0.001)
+
+        # Simulate water quality changes (temperature, ph, oxygen)
+        self.water_quality[:, :3] += self.rng.uniform(-1, 1, (n, 3)) * [0.1, 0.01, 0.1]
+
+        # Ground every UAV that left the fence
+        self.is_operational &= self.fence.contains_many(self.lat, self.lon)
+
+        self.fish_population.random_walk(self.rng)
+
+        if self.fish_finder.can_scan():
+            self.fish_finder.last_scan = self.clock.now()
+            self.detections = self.fish_population.grid(self.fish_finder.detection_range).query_many(
+                self.lat, self.lon, self.fish_finder.detection_range
+            )
+
+        self.clock.tick()
+
+    def move(self, uav_id: str, lat: float, lon: float, alt: float):
+        i = self.slot(uav_id)
+        self.lat[i], self.lon[i], self.alt[i] = lat, lon, alt
+
+    def perform_maintenance(self, uav_id: str):
+        i = self.slot(uav_id)
+        self.last_maintenance[i] = self.clock.now().timestamp()
+        self.battery_level[i] = 1.0
+        self.is_operational[i] = True
+
+    def get_detected_fish(self, uav_id: str) -> List[Fish]:
+        return self.fish_population.view(self.detections[self.slot(uav_id)])
+
+    def get_status(self, uav_id: str) -> Dict:
+        i = self.slot(uav_id)
+        return {
+            "id": uav_id,
+            "position": {
+                "lat": float(self.lat[i]),
+                "lon": float(self.lon[i]),
+                "alt": float(self.alt[i])
+            },
+            "battery_level": float(self.battery_level[i]),
+            "water_quality": dict(zip(WATER_QUALITY_FIELDS, self.water_quality[i].tolist())),
+            "is_operational": bool(self.is_operational[i]),
+            "last_maintenance": datetime.fromtimestamp(self.last_maintenance[i]).isoformat(),
+            "detected_fish": len(self.detections[i])
+        }
+
+    def get_statuses(self) -> List[Dict]:
+        return [self.get_status(uav_id) for uav_id in self.ids]
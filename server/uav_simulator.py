@@ -1,9 +1,16 @@
 from dataclasses import dataclass
-from typing import List, Dict, Optional
-import random
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Tuple
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import math
+import operator
+
+import numpy as np
+
+from sim_snapshot import read_snapshot, write_snapshot
+
+SPECIES = ["Bass", "Trout", "Salmon", "Tilapia"]
+METERS_PER_DEGREE = 111000  # rough flat-earth conversion used by the fish finder
 
 @dataclass
 class GPSPoint:
@@ -35,64 +42,500 @@ class UAVStatus:
     is_operational: bool
     last_maintenance: datetime
 
+class WallClock:
+    """Real time; the default clock for live simulators."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def tick(self):
+        pass
+
+class SimClock:
+    """Simulated time that only moves when the simulation ticks.
+
+    Each tick advances by a fixed ``timestep_seconds``, so scan intervals and
+    timestamps are reproducible and a run is not bound to wall-clock speed.
+    """
+
+    def __init__(self, start: Optional[datetime] = None, timestep_seconds: float = 1.0):
+        self.current = start or datetime(2000, 1, 1)
+        self.timestep = timedelta(seconds=timestep_seconds)
+
+    def now(self) -> datetime:
+        return self.current
+
+    def tick(self):
+        self.current += self.timestep
+
+class SpatialGrid:
+    """Uniform lat/lon grid over a set of points.
+
+    Points are bucketed into square cells and sorted by cell key, so the cells of
+    one grid row are contiguous and a range query is a handful of binary searches
+    plus an exact distance check on the candidates. After points move, ``update``
+    re-sorts only the points that changed cell.
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_meters: float):
+        self.lat = lat
+        self.lon = lon
+        self.cell = cell_meters / METERS_PER_DEGREE
+        self.stale = False
+        self._sort(self._point_keys())
+
+    def _point_keys(self) -> np.ndarray:
+        return self._keys(np.floor(self.lat / self.cell), np.floor(self.lon / self.cell))
+
+    def _sort(self, keys: np.ndarray):
+        self.keys = keys
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def update(self):
+        """Re-bucket points whose positions changed in place."""
+        self.stale = False
+        keys = self._point_keys()
+        moved = np.flatnonzero(keys != self.keys)
+        if len(moved) > len(keys) // 2:
+            self._sort(keys)
+            return
+        if not len(moved):
+            return
+        # Drop the moved points from the sorted arrays, then merge them back in
+        # at their new keys; cell order is all queries rely on
+        stay = keys[self.order] == self.sorted_keys
+        order, sorted_keys = self.order[stay], self.sorted_keys[stay]
+        moved = moved[np.argsort(keys[moved], kind="stable")]
+        positions = np.searchsorted(sorted_keys, keys[moved])
+        self.order = np.insert(order, positions, moved)
+        self.sorted_keys = np.insert(sorted_keys, positions, keys[moved])
+        self.keys = keys
+
+    @staticmethod
+    def _keys(row: np.ndarray, col: np.ndarray) -> np.ndarray:
+        return row.astype(np.int64) * (1 << 32) + col.astype(np.int64)
+
+    def query(self, lat: float, lon: float, range_meters: float) -> np.ndarray:
+        return self.query_many([lat], [lon], range_meters)[0]
+
+    def query_many(self, lats: Sequence[float], lons: Sequence[float],
+                   range_meters: float) -> List[np.ndarray]:
+        """Return, for every query point, the sorted indices within range."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if len(lats) == 0:
+            return []
+        reach = range_meters / METERS_PER_DEGREE
+        span = int(math.ceil(reach / self.cell))
+        rows = np.floor(lats / self.cell)[:, None] + np.arange(-span, span + 1)
+        cols = np.floor(lons / self.cell)[:, None]
+        starts = np.searchsorted(self.sorted_keys, self._keys(rows, cols - span), "left")
+        ends = np.searchsorted(self.sorted_keys, self._keys(rows, cols + span), "right")
+
+        # Expand every [start, end) run into candidate positions without a Python loop
+        lengths = (ends - starts).ravel()
+        total = int(lengths.sum())
+        run_offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts.ravel() - run_offsets, lengths) + np.arange(total)
+        owners = np.repeat(np.arange(len(lats)), lengths.reshape(starts.shape).sum(axis=1))
+        candidates = self.order[positions]
+
+        distance = np.hypot(self.lat[candidates] - lats[owners],
+                            self.lon[candidates] - lons[owners])
+        hit = distance <= reach
+        owners, candidates = owners[hit], candidates[hit]
+        ranked = np.lexsort((candidates, owners))
+        owners, candidates = owners[ranked], candidates[ranked]
+        counts = np.bincount(owners, minlength=len(lats))
+        return np.split(candidates, np.cumsum(counts)[:-1])
+
+    def query_box(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> np.ndarray:
+        """Sorted indices of the points inside a lat/lon bounding box."""
+        first_row, last_row = math.floor(min_lat / self.cell), math.floor(max_lat / self.cell)
+        if last_row - first_row > 1024:
+            # Viewport spans so many grid rows that a straight column scan is cheaper
+            candidates = np.arange(len(self.lat))
+        else:
+            rows = np.arange(first_row, last_row + 1)
+            first_col, last_col = math.floor(min_lon / self.cell), math.floor(max_lon / self.cell)
+            starts = np.searchsorted(self.sorted_keys, self._keys(rows, rows * 0 + first_col), "left")
+            ends = np.searchsorted(self.sorted_keys, self._keys(rows, rows * 0 + last_col), "right")
+            candidates = np.concatenate(
+                [self.order[start:end] for start, end in zip(starts, ends)] or [np.empty(0, dtype=np.int64)]
+            )
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return np.sort(candidates[inside])
+
+class FishPopulation:
+    """Struct-of-arrays fish population.
+
+    Each attribute lives in its own NumPy column so stepping and scanning run as
+    vectorized operations. ``Fish`` objects are only materialized on demand for
+    the rows a caller actually asks for.
+    """
+
+    def __init__(self,
+                 lat: np.ndarray,
+                 lon: np.ndarray,
+                 alt: np.ndarray,
+                 size: np.ndarray,
+                 species_code: np.ndarray,
+                 last_seen: np.ndarray,
+                 species_names: Sequence[str] = SPECIES,
+                 ids: Optional[Sequence[str]] = None):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.alt = np.asarray(alt, dtype=np.float64)
+        self.size = np.asarray(size, dtype=np.float64)
+        self.species_code = np.asarray(species_code, dtype=np.uint8)
+        self.last_seen = np.asarray(last_seen, dtype=np.float64)  # epoch seconds
+        self.species_names = list(species_names)
+        # None means the default "fish_<row>" naming, which costs no memory
+        self.ids = None if ids is None else list(ids)
+        self._grids: Dict[float, SpatialGrid] = {}
+
+    @classmethod
+    def random(cls, count: int, rng: np.random.Generator,
+               species_names: Sequence[str] = SPECIES,
+               now: Optional[datetime] = None) -> "FishPopulation":
+        return cls(
+            lat=rng.uniform(-0.01, 0.01, count),
+            lon=rng.uniform(-0.01, 0.01, count),
+            alt=rng.uniform(-5, -1, count),
+            size=rng.uniform(0.2, 1.0, count),
+            species_code=rng.integers(0, len(species_names), count),
+            last_seen=np.full(count, (now or datetime.now()).timestamp()),
+            species_names=species_names
+        )
+
+    @classmethod
+    def from_fish(cls, fish: Iterable[Fish]) -> "FishPopulation":
+        fish = list(fish)
+        species_names = list(dict.fromkeys(SPECIES + [f.species for f in fish]))
+        codes = {name: code for code, name in enumerate(species_names)}
+        return cls(
+            lat=[f.position.lat for f in fish],
+            lon=[f.position.lon for f in fish],
+            alt=[f.position.alt for f in fish],
+            size=[f.size for f in fish],
+            species_code=[codes[f.species] for f in fish],
+            last_seen=[f.last_seen.timestamp() for f in fish],
+            species_names=species_names,
+            ids=[f.id for f in fish]
+        )
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getitem__(self, index):
+        # Same indexing as the list of Fish this replaced
+        if isinstance(index, slice):
+            return self.view(range(*index.indices(len(self))))
+        index = operator.index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("fish index out of range")
+        return self.fish_at(index)
+
+    def __iter__(self) -> Iterator[Fish]:
+        for i in range(len(self)):
+            yield self.fish_at(i)
+
+    def fish_id(self, index: int) -> str:
+        return f"fish_{index}" if self.ids is None else self.ids[index]
+
+    def fish_at(self, index: int) -> Fish:
+        index = int(index)
+        return Fish(
+            id=self.fish_id(index),
+            position=GPSPoint(
+                lat=float(self.lat[index]),
+                lon=float(self.lon[index]),
+                alt=float(self.alt[index])
+            ),
+            species=self.species_names[self.species_code[index]],
+            size=float(self.size[index]),
+            last_seen=datetime.fromtimestamp(self.last_seen[index])
+        )
+
+    def view(self, indices: Iterable[int]) -> List[Fish]:
+        return [self.fish_at(i) for i in indices]
+
+    def random_walk(self, rng: np.random.Generator):
+        n = len(self)
+        self.lat += rng.uniform(-0.0001, 0.0001, n)
+        self.lon += rng.uniform(-0.0001, 0.0001, n)
+        self.alt += rng.uniform(-0.1, 0.1, n)
+        self.mark_moved()
+
+    def mark_moved(self):
+        """Flag spatial indexes as stale after positions were changed in place."""
+        for grid in self._grids.values():
+            grid.stale = True
+
+    def grid(self, cell_meters: float) -> SpatialGrid:
+        # Built lazily and brought up to date on use, so ticks without a scan
+        # never pay for the index
+        grid = self._grids.get(cell_meters)
+        if grid is None:
+            grid = self._grids[cell_meters] = SpatialGrid(self.lat, self.lon, cell_meters)
+        elif grid.stale:
+            grid.update()
+        return grid
+
+    def within_range(self, point: GPSPoint, range_meters: float) -> np.ndarray:
+        grid = self._grids.get(range_meters)
+        if grid is None or grid.stale:
+            # A single query costs one linear pass; updating the grid for it
+            # would cost more than the pass itself
+            reach = range_meters / METERS_PER_DEGREE
+            return np.flatnonzero(np.hypot(self.lat - point.lat, self.lon - point.lon) <= reach)
+        return grid.query(point.lat, point.lon, range_meters)
+
+    def within_range_many(self, points: Sequence[GPSPoint], range_meters: float) -> List[np.ndarray]:
+        return self.grid(range_meters).query_many(
+            [p.lat for p in points], [p.lon for p in points], range_meters
+        )
+
+    def query(self,
+              rows: Optional[np.ndarray] = None,
+              bbox: Optional[Sequence[float]] = None,
+              species: Optional[Sequence[str]] = None,
+              min_size: Optional[float] = None,
+              after: Optional[int] = None,
+              limit: Optional[int] = None,
+              cell_meters: float = 50) -> Tuple[np.ndarray, Optional[int]]:
+        """Filter rows by bounding box, species and size, one page at a time.
+
+        ``rows`` restricts the query to a subset (e.g. the latest detections);
+        without it the bounding box is answered from the spatial grid. ``bbox``
+        is (min_lat, max_lat, min_lon, max_lon). Results are in row order and
+        ``after`` is the cursor returned with the previous page; the returned
+        cursor is None on the last page.
+        """
+        if rows is None:
+            rows = self.grid(cell_meters).query_box(*bbox) if bbox else np.arange(len(self))
+        else:
+            rows = np.sort(np.asarray(rows, dtype=np.int64))
+            if bbox:
+                min_lat, max_lat, min_lon, max_lon = bbox
+                lat, lon = self.lat[rows], self.lon[rows]
+                rows = rows[(lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)]
+
+        if after is not None:
+            rows = rows[np.searchsorted(rows, after, "right"):]
+        if species:
+            codes = [code for code, name in enumerate(self.species_names) if name in species]
+            rows = rows[np.isin(self.species_code[rows], codes)]
+        if min_size is not None:
+            rows = rows[self.size[rows] >= min_size]
+
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            return rows, int(rows[-1])
+        return rows, None
+
+EARTH_RADIUS_METERS = 6371000
+
+def haversine_meters(lat1: np.ndarray, lon1: np.ndarray,
+                     lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Element-wise haversine distance; all arguments are in radians."""
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return EARTH_RADIUS_METERS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
 class GPSFence:
     def __init__(self, center: GPSPoint, radius_meters: float):
         self.center = center
         self.radius = radius_meters
+        self._radians_key = None
+
+    def center_radians(self):
+        # Cached, but re-derived if someone moves the center in place
+        key = (self.center.lat, self.center.lon)
+        if key != self._radians_key:
+            self._radians_key = key
+            self._center_radians = (math.radians(key[0]), math.radians(key[1]))
+            self._cos_center_lat = math.cos(self._center_radians[0])
+        return self._center_radians
+
+    def bounding_box(self):
+        """(min_lat, max_lat, min_lon, max_lon) in degrees enclosing the circle.
+
+        Longitudes may run past +/-180 when the circle crosses the antimeridian.
+        """
+        lat, _ = self.center_radians()
+        delta = self.radius / EARTH_RADIUS_METERS  # angular radius
+        min_lat = max(self.center.lat - math.degrees(delta), -90.0)
+        max_lat = min(self.center.lat + math.degrees(delta), 90.0)
+        if abs(lat) + delta >= math.pi / 2 or delta >= math.pi / 2:
+            # The circle reaches a pole, so it spans every longitude
+            return (min_lat, max_lat, -180.0, 180.0)
+        # Widest longitude offset on the circle (tangent from the center meridian)
+        dlon = math.degrees(math.asin(math.sin(delta) / self._cos_center_lat))
+        return (min_lat, max_lat, self.center.lon - dlon, self.center.lon + dlon)
 
     def is_within_bounds(self, point: GPSPoint) -> bool:
         # Haversine formula for distance calculation
-        R = 6371000  # Earth's radius in meters
-        lat1, lon1 = math.radians(self.center.lat), math.radians(self.center.lon)
+        R = EARTH_RADIUS_METERS
+        lat1, lon1 = self.center_radians()
         lat2, lon2 = math.radians(point.lat), math.radians(point.lon)
         
         dlat = lat2 - lat1
         dlon = lon2 - lon1
         
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+        a = math.sin(dlat/2)**2 + self._cos_center_lat * math.cos(lat2) * math.sin(dlon/2)**2
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         distance = R * c
         
         return distance <= self.radius
 
+    def contains_many(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        return FenceSet([self]).contains_matrix(lats, lons)[:, 0]
+
+class PolygonFence:
+    """Fence bounded by a simple lat/lon polygon (vertices in order, not closed)."""
+
+    def __init__(self, vertices: Sequence[GPSPoint]):
+        if len(vertices) < 3:
+            raise ValueError("A polygon fence needs at least three vertices")
+        self.vertices = list(vertices)
+        self.lats = np.array([v.lat for v in self.vertices])
+        # Unwrap so edges crossing the antimeridian stay short; the polygon then
+        # lives in [min_lon, min_lon + 360) and may extend past 180
+        lons = np.degrees(np.unwrap(np.radians([v.lon for v in self.vertices])))
+        self.lons = lons - 360.0 * math.floor((lons.min() + 180.0) / 360.0)
+        self.min_lon = self.lons.min()
+
+    def bounding_box(self):
+        return (self.lats.min(), self.lats.max(), self.lons.min(), self.lons.max())
+
+    def is_within_bounds(self, point: GPSPoint) -> bool:
+        return bool(self.contains_many(np.array([point.lat]), np.array([point.lon]))[0])
+
+    def contains_many(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        return FenceSet([self]).contains_matrix(lats, lons)[:, 0]
+
+    def _ray_cast(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        # Even-odd rule: count polygon edges crossed by a ray heading east
+        lons = self.min_lon + np.mod(lons - self.min_lon, 360.0)
+        lat1, lon1 = self.lats[None, :], self.lons[None, :]
+        lat2, lon2 = np.roll(self.lats, -1)[None, :], np.roll(self.lons, -1)[None, :]
+        lats, lons = lats[:, None], lons[:, None]
+        straddles = (lat1 > lats) != (lat2 > lats)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_lon = lon1 + (lats - lat1) * (lon2 - lon1) / (lat2 - lat1)
+        crossings = straddles & (lons < crossing_lon)
+        return crossings.sum(axis=1) % 2 == 1
+
+class FenceSet:
+    """Batch geofencing of many points against many circle and polygon fences.
+
+    Every fence's bounding box is checked first for all points at once; only
+    the (point, fence) pairs that survive pay for the haversine or
+    point-in-polygon test.
+    """
+
+    def __init__(self, fences: Sequence):
+        self.fences = list(fences)
+        self.boxes = np.array([f.bounding_box() for f in self.fences], dtype=np.float64).reshape(-1, 4)
+        self.circles = [i for i, f in enumerate(self.fences) if isinstance(f, GPSFence)]
+        self.polygons = [i for i, f in enumerate(self.fences) if isinstance(f, PolygonFence)]
+        centers = [self.fences[i].center_radians() for i in self.circles]
+        self.circle_lat = np.array([c[0] for c in centers])
+        self.circle_lon = np.array([c[1] for c in centers])
+        self.circle_radius = np.array([self.fences[i].radius for i in self.circles])
+
+    def contains_matrix(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Boolean (points x fences) matrix of which fences contain which points."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        # Longitudes are compared as eastward offsets from the box's west edge,
+        # so boxes crossing the antimeridian need no special case
+        lon_offset = np.mod(lons[:, None] - self.boxes[:, 2], 360.0)
+        inside = ((lats[:, None] >= self.boxes[:, 0]) & (lats[:, None] <= self.boxes[:, 1]) &
+                  (lon_offset <= self.boxes[:, 3] - self.boxes[:, 2]))
+
+        if self.circles:
+            points, slots = np.nonzero(inside[:, self.circles])
+            distance = haversine_meters(
+                np.radians(lats[points]), np.radians(lons[points]),
+                self.circle_lat[slots], self.circle_lon[slots]
+            )
+            inside[points, np.asarray(self.circles)[slots]] = distance <= self.circle_radius[slots]
+
+        for i in self.polygons:
+            candidates = np.flatnonzero(inside[:, i])
+            inside[candidates, i] = self.fences[i]._ray_cast(lats[candidates], lons[candidates])
+
+        return inside
+
+    def contains_many(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """True for points inside at least one fence."""
+        return self.contains_matrix(lats, lons).any(axis=1)
+
+    def is_within_bounds(self, point: GPSPoint) -> bool:
+        return bool(self.contains_many(np.array([point.lat]), np.array([point.lon]))[0])
+
 class FishFinder:
-    def __init__(self, detection_range_meters: float):
+    def __init__(self, detection_range_meters: float, clock=None):
         self.detection_range = detection_range_meters
+        self.clock = clock or WallClock()
         self.last_scan: Optional[datetime] = None
         self.scan_interval = 5  # seconds
 
     def can_scan(self) -> bool:
         if not self.last_scan:
             return True
-        return (datetime.now() - self.last_scan).total_seconds() >= self.scan_interval
+        return (self.clock.now() - self.last_scan).total_seconds() >= self.scan_interval
 
-    def scan(self, uav_position: GPSPoint, fish_population: List[Fish]) -> List[Fish]:
-        if not self.can_scan():
+    def scan(self, uav_position: GPSPoint, fish_population: FishPopulation) -> List[Fish]:
+        detected = self.scan_indices(uav_position, fish_population)
+        if detected is None:
             return []
+        return fish_population.view(detected)
+
+    def scan_indices(self, uav_position: GPSPoint, fish_population: FishPopulation) -> Optional[np.ndarray]:
+        """Population rows in range, or None when the scan interval has not elapsed."""
+        if not self.can_scan():
+            return None
         
-        self.last_scan = datetime.now()
-        detected_fish = []
-        
-        for fish in fish_population:
-            # Simple distance calculation (in a real system, we'd use proper 3D distance)
-            distance = math.sqrt(
-                (fish.position.lat - uav_position.lat)**2 +
-                (fish.position.lon - uav_position.lon)**2
-            ) * 111000  # rough conversion to meters
-            
-            if distance <= self.detection_range:
-                detected_fish.append(fish)
-        
-        return detected_fish
+        self.last_scan = self.clock.now()
+        # Simple distance calculation (in a real system, we'd use proper 3D distance)
+        return fish_population.within_range(uav_position, self.detection_range)
+
+    def scan_many(self, uav_positions: Sequence[GPSPoint], fish_population: FishPopulation) -> List[List[Fish]]:
+        if not self.can_scan():
+            return [[] for _ in uav_positions]
+
+        self.last_scan = self.clock.now()
+        detected = fish_population.within_range_many(uav_positions, self.detection_range)
+        return [fish_population.view(indices) for indices in detected]
+
+class StaleCursorError(ValueError):
+    """A paging cursor refers to detections that a newer scan replaced."""
+
+def _parse_cursor(cursor: str, scanned: bool) -> Tuple[Optional[int], int]:
+    """Split a query_fish cursor into (scan_id, row); raises ValueError when malformed."""
+    parts = str(cursor).split(":")
+    if len(parts) != (2 if scanned else 1):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    numbers = [int(part) for part in parts]
+    return (numbers[0] if scanned else None), numbers[-1]
 
 class UAVSimulator:
-    def __init__(self):
+    def __init__(self, fish_count: int = 50, clock=None, seed: Optional[int] = None):
+        # Pass a SimClock and a seed for reproducible, faster-than-real-time runs
+        self.clock = clock or WallClock()
+        self.rng = np.random.default_rng(seed)
         self.status = UAVStatus(
             position=GPSPoint(0.0, 0.0, 0.0),
             battery_level=1.0,
             water_quality=WaterQuality(25.0, 7.0, 8.0, 35.0, 1.0),
             is_operational=True,
-            last_maintenance=datetime.now()
+            last_maintenance=self.clock.now()
         )
         
         self.fence = GPSFence(
@@ -100,46 +543,193 @@ class UAVSimulator:
             radius_meters=1000
         )
         
-        self.fish_finder = FishFinder(detection_range_meters=50)
-        self.fish_population: List[Fish] = []
-        self.initialize_fish_population()
-
-    def initialize_fish_population(self):
-        species = ["Bass", "Trout", "Salmon", "Tilapia"]
-        for i in range(50):  # Start with 50 fish
-            self.fish_population.append(Fish(
-                id=f"fish_{i}",
-                position=GPSPoint(
-                    lat=random.uniform(-0.01, 0.01),
-                    lon=random.uniform(-0.01, 0.01),
-                    alt=random.uniform(-5, -1)
-                ),
-                species=random.choice(species),
-                size=random.uniform(0.2, 1.0),
-                last_seen=datetime.now()
-            ))
+        self.fish_finder = FishFinder(detection_range_meters=50, clock=self.clock)
+        # Bumped whenever detected_rows changes, so detection cursors can tell
+        # which scan they were paging through
+        self.scan_id = 0
+        self.initialize_fish_population(fish_count)
+
+    @property
+    def fish_population(self) -> FishPopulation:
+        return self._fish_population
+
+    @fish_population.setter
+    def fish_population(self, population):
+        if not isinstance(population, FishPopulation):
+            population = FishPopulation.from_fish(population)
+        self._fish_population = population
+        self.detected_rows = np.empty(0, dtype=np.int64)
+        self.scan_id += 1
+
+    def initialize_fish_population(self, count: int = 50):
+        self.fish_population = FishPopulation.random(count, self.rng, now=self.clock.now())
 
     def update_status(self):
         # Simulate battery drain
         self.status.battery_level = max(0.0, self.status.battery_level - 0.001)
         
         # Simulate water quality changes
-        self.status.water_quality.temperature += random.uniform(-0.1, 0.1)
-        self.status.water_quality.ph += random.uniform(-0.01, 0.01)
-        self.status.water_quality.oxygen += random.uniform(-0.1, 0.1)
+        self.status.water_quality.temperature += self.rng.uniform(-0.1, 0.1)
+        self.status.water_quality.ph += self.rng.uniform(-0.01, 0.01)
+        self.status.water_quality.oxygen += self.rng.uniform(-0.1, 0.1)
         
         # Check if UAV is within fence
         if not self.fence.is_within_bounds(self.status.position):
             self.status.is_operational = False
         
-        # Update fish positions
-        for fish in self.fish_population:
-            fish.position.lat += random.uniform(-0.0001, 0.0001)
-            fish.position.lon += random.uniform(-0.0001, 0.0001)
-            fish.position.alt += random.uniform(-0.1, 0.1)
+        # Update fish positions in one vectorized step
+        self.fish_population.random_walk(self.rng)
+
+        self.clock.tick()
+
+    def run(self, hours: float) -> Dict:
+        """Step through ``hours`` of simulated time as fast as possible.
+
+        Meant for a SimClock; with the wall clock every tick would still be one
+        timestep of simulated time but scans would follow real time.
+        """
+        timestep = getattr(self.clock, "timestep", timedelta(seconds=1)).total_seconds()
+        steps = int(round(hours * 3600 / timestep))
+        started = time.perf_counter()
+        scans = 0
+        detections = 0
+        for _ in range(steps):
+            self.update_status()
+            if self.fish_finder.can_scan():
+                scans += 1
+                detections += len(self.get_detected_fish())
+        return {
+            "steps": steps,
+            "simulated_seconds": steps * timestep,
+            "wall_seconds": time.perf_counter() - started,
+            "scans": scans,
+            "detections": detections,
+            "battery_level": self.status.battery_level,
+            "is_operational": self.status.is_operational
+        }
+
+    def scan(self) -> Optional[np.ndarray]:
+        """Run the fish finder; returns the detected rows, or None if no scan was due.
+
+        The rows of the latest scan stay available as ``detected_rows``.
+        """
+        rows = self.fish_finder.scan_indices(self.status.position, self.fish_population)
+        if rows is not None:
+            self.detected_rows = rows
+            self.scan_id += 1
+        return rows
 
     def get_detected_fish(self) -> List[Fish]:
-        return self.fish_finder.scan(self.status.position, self.fish_population)
+        rows = self.scan()
+        if rows is None:
+            return []
+        return self.fish_population.view(rows)
+
+    def query_fish(self, detected_only: bool = True, after: Optional[str] = None,
+                   **filters) -> Tuple[List[Fish], Optional[str]]:
+        """Filter the latest detections (or the whole population) with FishPopulation.query.
+
+        Detections are those of the latest ``scan``; querying never scans.
+        Cursors over detections are ``"<scan_id>:<row>"``; once another scan
+        replaces the detections they raise StaleCursorError instead of skipping
+        or repeating rows. Population cursors are the plain row.
+        """
+        rows = None
+        row_after = None
+        if detected_only:
+            if after is not None:
+                scan_id, row_after = _parse_cursor(after, scanned=True)
+                if scan_id != self.scan_id:
+                    raise StaleCursorError("Detections changed since this cursor was issued; restart the query")
+            rows = self.detected_rows
+        elif after is not None:
+            _, row_after = _parse_cursor(after, scanned=False)
+        rows, cursor = self.fish_population.query(
+            rows=rows, after=row_after, cell_meters=self.fish_finder.detection_range, **filters
+        )
+        if cursor is not None:
+            cursor = f"{self.scan_id}:{cursor}" if detected_only else str(cursor)
+        return self.fish_population.view(rows), cursor
+
+    def save_snapshot(self, path: str):
+        """Write the full simulator state to a memory-mappable snapshot file."""
+        population = self.fish_population
+        status = self.status
+        clock = {"type": "wall"}
+        if isinstance(self.clock, SimClock):
+            clock = {
+                "type": "sim",
+                "now": self.clock.now().isoformat(),
+                "timestep_seconds": self.clock.timestep.total_seconds()
+            }
+        header = {
+            "position": [status.position.lat, status.position.lon, status.position.alt],
+            "battery_level": status.battery_level,
+            "water_quality": [
+                status.water_quality.temperature,
+                status.water_quality.ph,
+                status.water_quality.oxygen,
+                status.water_quality.salinity,
+                status.water_quality.turbidity
+            ],
+            "is_operational": status.is_operational,
+            "last_maintenance": status.last_maintenance.isoformat(),
+            "fence": [self.fence.center.lat, self.fence.center.lon, self.fence.center.alt, self.fence.radius],
+            "last_scan": self.fish_finder.last_scan.isoformat() if self.fish_finder.last_scan else None,
+            "clock": clock,
+            "rng_state": self.rng.bit_generator.state,
+            "species_names": population.species_names
+        }
+        columns = {
+            "lat": population.lat,
+            "lon": population.lon,
+            "alt": population.alt,
+            "size": population.size,
+            "species_code": population.species_code,
+            "last_seen": population.last_seen
+        }
+        if population.ids is not None:
+            columns["ids"] = np.array(population.ids, dtype=str)
+        write_snapshot(path, header, columns)
+
+    @classmethod
+    def load_snapshot(cls, path: str, clock=None, mmap_mode: Optional[str] = "c") -> "UAVSimulator":
+        """Restore a simulator saved with save_snapshot.
+
+        Fish columns are memory-mapped copy-on-write by default, so many workers
+        can warm-start from one file without each holding a private copy.
+        """
+        header, columns = read_snapshot(path, mmap_mode=mmap_mode)
+        if clock is None and header["clock"]["type"] == "sim":
+            clock = SimClock(
+                start=datetime.fromisoformat(header["clock"]["now"]),
+                timestep_seconds=header["clock"]["timestep_seconds"]
+            )
+
+        sim = cls(fish_count=0, clock=clock)
+        sim.rng.bit_generator.state = header["rng_state"]
+        sim.status = UAVStatus(
+            position=GPSPoint(*header["position"]),
+            battery_level=header["battery_level"],
+            water_quality=WaterQuality(*header["water_quality"]),
+            is_operational=header["is_operational"],
+            last_maintenance=datetime.fromisoformat(header["last_maintenance"])
+        )
+        lat, lon, alt, radius = header["fence"]
+        sim.fence = GPSFence(center=GPSPoint(lat, lon, alt), radius_meters=radius)
+        if header["last_scan"]:
+            sim.fish_finder.last_scan = datetime.fromisoformat(header["last_scan"])
+        sim.fish_population = FishPopulation(
+            lat=columns["lat"],
+            lon=columns["lon"],
+            alt=columns["alt"],
+            size=columns["size"],
+            species_code=columns["species_code"],
+            last_seen=columns["last_seen"],
+            species_names=header["species_names"],
+            ids=columns["ids"].tolist() if "ids" in columns else None
+        )
+        return sim
 
     def get_status(self) -> Dict:
         return {
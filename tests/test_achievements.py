@@ -0,0 +1,57 @@
+import pytest
+from datetime import datetime, timedelta
+from achievements import AchievementService, AchievementType
+
+def test_check_many_unlocks_each_achievement_once():
+    service = AchievementService()
+    events = []
+    for i in range(1000):
+        profile_id = f"p{i % 10}"
+        events.append({"type": "fish_found", "profile_id": profile_id, "fish_data": {"id": i}})
+        events.append({"type": "sellout", "profile_id": profile_id, "purchase_data": {"item_name": "lure"}})
+    events.append({"type": "global_hero", "profile_id": "p0", "rank": 2})
+
+    unlocked = service.check_many(events)
+
+    assert len(unlocked) == 20
+    assert unlocked[0][1].metadata == {"fish_data": {"id": 0}}
+    assert service.has_achievement("p3", AchievementType.SELLOUT)
+    assert not service.has_achievement("p0", AchievementType.GLOBAL_HERO)
+    assert [a.type for a in service.get_achievements("p0")] == [AchievementType.FISH_FOUND, AchievementType.SELLOUT]
+    assert service.check_fish_found("p0", {}) is None
+
+def test_check_many_rejects_unknown_events():
+    with pytest.raises(ValueError):
+        AchievementService().check_many([{"type": "kraken", "profile_id": "p0"}])
+
+def test_solar_cleaner_compares_against_window_minimum():
+    service = AchievementService()
+    start = datetime(2024, 6, 1)
+    efficiencies = [0.50, 0.40, 0.45, 0.44, 0.47]
+    for hour, efficiency in enumerate(efficiencies):
+        service.record_solar_reading("p0", {"efficiency": efficiency}, timestamp=start + timedelta(hours=hour * 12))
+    assert service.check_solar_cleaner("p0") is None
+
+    # 0.49 beats the window minimum (0.40, 36 hours earlier) by more than 20%
+    service.record_solar_reading("p0", {"efficiency": 0.49}, timestamp=start + timedelta(hours=48))
+    achievement = service.check_solar_cleaner("p0")
+
+    assert achievement.type == AchievementType.SOLAR_CLEANER
+    assert achievement.metadata["improvement"] == pytest.approx(0.09)
+    assert achievement.metadata["time_taken"] == "1 day, 12:00:00"
+    assert service.check_solar_cleaner("p0") is None
+
+def test_solar_readings_outside_window_are_archived_then_evicted():
+    service = AchievementService()
+    start = datetime(2024, 6, 1)
+    for hour in range(24 * 40):
+        service.record_solar_reading("p0", {"efficiency": 0.5}, timestamp=start + timedelta(hours=hour))
+
+    history = service.solar_readings["p0"]
+    times, efficiency = history.archived()
+    assert len(history.recent) == 49
+    assert len(times) == 24 * 30 - 48  # 30 days retained, minus the 48 hours still in the window
+    assert set(efficiency) == {0.5}
+    assert service.check_solar_cleaner("p0") is None
+    with pytest.raises(ValueError):
+        service.record_solar_reading("p0", {"efficiency": 0.9}, timestamp=start)
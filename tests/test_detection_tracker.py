@@ -0,0 +1,51 @@
+import pytest
+from datetime import datetime
+from detection_tracker import DetectionTracker, ENTERED, MOVED, LEFT
+from uav_simulator import Fish, FishPopulation, GPSPoint
+
+def make_population():
+    return FishPopulation.from_fish([
+        Fish(f"fish_{i}", GPSPoint(0.0, i * 0.0001, -2.0), "Bass", 0.5, datetime.now())
+        for i in range(4)
+    ])
+
+def test_tracker_emits_only_changes():
+    population = make_population()
+    tracker = DetectionTracker(move_threshold_meters=5.0)
+
+    first = tracker.update(population, [0, 1, 2])
+    assert [(e.type, e.fish_id) for e in first] == [(ENTERED, "fish_0"), (ENTERED, "fish_1"), (ENTERED, "fish_2")]
+
+    assert tracker.update(population, [0, 1, 2]) == []
+
+    population.lat[1] += 0.001  # ~111 m
+    events = tracker.update(population, [1, 2, 3])
+    assert [(e.type, e.fish_id) for e in events] == [(LEFT, "fish_0"), (ENTERED, "fish_3"), (MOVED, "fish_1")]
+    assert events[0].fish is None
+    assert events[2].fish.position.lat == pytest.approx(0.001)
+
+def test_slow_drift_accumulates_into_a_move():
+    population = make_population()
+    tracker = DetectionTracker(move_threshold_meters=5.0)
+    tracker.update(population, [0])
+
+    population.lat[0] += 0.00003  # ~3.3 m, below the threshold
+    assert tracker.update(population, [0]) == []
+    population.lat[0] += 0.00003
+    assert [e.type for e in tracker.update(population, [0])] == [MOVED]
+
+def test_subscribers_get_replay_and_updates():
+    population = make_population()
+    tracker = DetectionTracker()
+    tracker.update(population, [0, 1])
+
+    received = []
+    unsubscribe = tracker.subscribe(received.extend)
+    assert [e.fish_id for e in received] == ["fish_0", "fish_1"]
+
+    tracker.update(population, [1])
+    assert (received[-1].type, received[-1].fish_id) == (LEFT, "fish_0")
+
+    unsubscribe()
+    tracker.update(population, [])
+    assert len(received) == 3
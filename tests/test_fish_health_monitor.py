@@ -0,0 +1,349 @@
+import pytest
+import asyncio
+from datetime import datetime, timedelta
+import numpy as np
+from geopy.distance import geodesic
+from aiohttp import web
+from fastapi import HTTPException
+from fish_health_monitor import FishHealthMonitor, InvestmentPosition
+
+async def start_stub_upstream(delay: float = 0.05, statuses=()):
+    """Local stand-in for the FWS service that counts the requests it serves.
+
+    The first requests answer with ``statuses`` in turn, later ones with 200.
+    """
+    hits = []
+
+    async def handle(request):
+        hits.append(request.path)
+        await asyncio.sleep(delay)
+        status = statuses[len(hits) - 1] if len(hits) <= len(statuses) else 200
+        return web.Response(text="{}", status=status)
+
+    app = web.Application()
+    app.router.add_get("/data", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/data", hits
+
+def test_concurrent_misses_share_one_upstream_fetch():
+    async def scenario():
+        runner, url, hits = await start_stub_upstream()
+        monitor = FishHealthMonitor(fws_data_url=url)
+        try:
+            results = await asyncio.gather(*[
+                monitor.get_fish_health_data("Bass", {"lat": 35.0 + i * 1e-4, "lon": -120.0})
+                for i in range(20)
+            ])
+            await monitor.get_fish_health_data("Bass", {"lat": 35.0, "lon": -120.0})
+            await monitor.get_fish_health_data("Trout", {"lat": 35.0, "lon": -120.0})
+            await monitor.get_fish_health_data("Bass", {"lat": 10.0, "lon": 10.0})
+        finally:
+            await monitor.close()
+            await runner.cleanup()
+        return results, hits
+
+    results, hits = asyncio.run(scenario())
+
+    assert len(hits) == 3
+    assert results[5].location == {"lat": 35.0005, "lon": -120.0}
+
+def test_expired_entries_are_fetched_again():
+    async def scenario():
+        runner, url, hits = await start_stub_upstream(delay=0)
+        monitor = FishHealthMonitor(fws_data_url=url, health_cache_ttl=0)
+        try:
+            for _ in range(3):
+                await monitor.get_fish_health_data("Bass", {"lat": 35.0, "lon": -120.0})
+        finally:
+            await monitor.close()
+            await runner.cleanup()
+        return hits
+
+    assert len(asyncio.run(scenario())) == 3
+
+def test_upstream_errors_are_not_cached():
+    async def scenario():
+        runner, url, hits = await start_stub_upstream(delay=0, statuses=(503,))
+        monitor = FishHealthMonitor(fws_data_url=url)
+        try:
+            with pytest.raises(HTTPException):
+                await monitor.get_fish_health_data("Bass", {"lat": 35.0, "lon": -120.0})
+            metrics = await monitor.get_fish_health_data("Bass", {"lat": 35.0, "lon": -120.0})
+            await monitor.get_fish_health_data("Bass", {"lat": 35.0, "lon": -120.0})
+        finally:
+            await monitor.close()
+            await runner.cleanup()
+        return metrics, hits
+
+    metrics, hits = asyncio.run(scenario())
+
+    assert metrics.species == "Bass"
+    assert len(hits) == 2
+
+def test_batch_returns_dedupe_health_lookups():
+    async def scenario():
+        runner, url, hits = await start_stub_upstream(delay=0)
+        monitor = FishHealthMonitor(fws_data_url=url)
+        species = ["Bass", "Trout", "Salmon"]
+        types = ["direct", "sustainable_fisheries", "direct", "local_food_security"]
+        positions = [
+            InvestmentPosition(species=species[i % 3], amount=100.0, investment_type=types[i % 4])
+            for i in range(3000)
+        ]
+        try:
+            rates = await monitor.calculate_investment_returns(positions)
+            single = [await monitor.calculate_investment_return(p.species, p.amount, p.investment_type)
+                      for p in positions[:8]]
+        finally:
+            await monitor.close()
+            await runner.cleanup()
+        return rates, single, hits
+
+    rates, single, hits = asyncio.run(scenario())
+
+    assert len(hits) == 3
+    assert rates[:8].tolist() == pytest.approx(single)
+    assert rates[1] == 0.04
+
+def test_batch_returns_reject_unknown_types():
+    monitor = FishHealthMonitor()
+    positions = [InvestmentPosition(species="Bass", amount=1, investment_type="crypto")]
+    with pytest.raises(ValueError):
+        asyncio.run(monitor.calculate_investment_returns(positions))
+
+def test_global_leaderboard_tracks_updates():
+    monitor = FishHealthMonitor()
+    for i in range(1000):
+        monitor.update_community_impact(f"p{i}", {"name": f"P{i}", "total_investment": i})
+
+    assert [e.profile_id for e in monitor.get_global_leaderboard(3)] == ["p999", "p998", "p997"]
+    assert monitor.get_global_rank("p0").rank == 1000
+
+    monitor.update_community_impact("p0", {"name": "P0", "total_investment": 5000})
+
+    top = monitor.get_global_leaderboard(2)
+    assert [(e.profile_id, e.rank) for e in top] == [("p0", 1), ("p999", 2)]
+    assert top[0].score == pytest.approx(5000 * 0.3)
+    assert monitor.get_global_rank("p1").rank == 1000
+    assert monitor.get_global_rank("missing") is None
+
+def test_local_leaderboard_matches_geodesic_scan():
+    monitor = FishHealthMonitor()
+    rng = np.random.default_rng(11)
+    for i, (lat, lon) in enumerate(rng.uniform([33, -122], [37, -118], (2000, 2))):
+        monitor.update_community_impact(f"p{i}", {
+            "name": f"P{i}",
+            "location": {"lat": lat, "lon": lon},
+            "sustainable_catches": int(rng.integers(0, 100))
+        })
+    center = {"lat": 35.0, "lon": -120.0}
+
+    board = monitor.get_local_leaderboard(center, radius_km=50, limit=10000, precise=True)
+
+    expected = {
+        profile_id for profile_id, impact in monitor.community_impacts.items()
+        if geodesic((35.0, -120.0), (impact.location["lat"], impact.location["lon"])).kilometers <= 50
+    }
+    assert {e.profile_id for e in board} == expected
+    assert [e.rank for e in board] == list(range(1, len(board) + 1))
+    assert all(a.score >= b.score for a, b in zip(board, board[1:]))
+
+def test_local_index_handles_antimeridian():
+    monitor = FishHealthMonitor()
+    monitor.update_community_impact("east", {"name": "East", "location": {"lat": 0.0, "lon": 179.9}})
+    monitor.update_community_impact("west", {"name": "West", "location": {"lat": 0.0, "lon": -179.9}})
+
+    board = monitor.get_local_leaderboard({"lat": 0.0, "lon": 179.95}, radius_km=50)
+
+    assert {e.profile_id for e in board} == {"east", "west"}
+
+def test_friend_graph_leaderboards_and_import():
+    monitor = FishHealthMonitor()
+    for i in range(6):
+        monitor.update_community_impact(f"p{i}", {"name": f"P{i}", "sustainable_catches": i})
+
+    counts = monitor.import_friends([
+        ("p0", "p1"), ("p0", "p2"), ("p1", "p3"), ("p2", "p4"), ("p3", "p0"),
+        ("p1", "p0"), ("p0", "p0"), ("p0", "ghost"),
+    ])
+
+    assert counts == {"added": 5, "duplicates": 1, "skipped": 2}
+    assert [e.profile_id for e in monitor.get_friends_leaderboard("p0")] == ["p3", "p2", "p1"]
+    assert [e.profile_id for e in monitor.get_friends_of_friends_leaderboard("p0")] == ["p4"]
+    assert sorted(monitor.community_impacts["p3"].friends) == ["p0", "p1"]
+
+    # Updating a profile keeps its friendships
+    monitor.update_community_impact("p0", {"name": "P0", "friends": ["p5", "ghost"]})
+    assert sorted(monitor.community_impacts["p0"].friends) == ["p1", "p2", "p3", "p5"]
+    assert monitor.community_impacts["p5"].friends == ["p0"]
+    # Unknown profiles are skipped, as with import_friends
+    assert monitor.friends_network.friends("ghost") == set()
+    assert "ghost" not in {friend for link in monitor.storage.load_friend_links() for friend in link[:2]}
+
+def test_batch_interest_accrual_matches_per_account_formula():
+    monitor = FishHealthMonitor()
+    rng = np.random.default_rng(2)
+    now = datetime.now()
+    balances = rng.uniform(0, 10000, 50000)
+    ages = rng.integers(0, 10, 50000) + 0.5
+    template = monitor.create_savings_account("p0")
+    accounts = []
+    for i, (balance, age) in enumerate(zip(balances, ages)):
+        accounts.append((f"p{i}", template.copy(update={
+            "balance": balance, "last_interest_payment": now - timedelta(days=age)
+        })))
+    monitor.import_savings_accounts(accounts)
+
+    summary = monitor.accrue_all_interest()
+
+    expected = balances * 0.04 / 365 * np.floor(ages)
+    assert summary["accounts"] == 50000
+    assert summary["total_interest"] == pytest.approx(expected.sum())
+    account = monitor.get_savings_account("p7")
+    assert account.balance == pytest.approx(balances[7] + expected[7])
+    # Only whole days are paid; the remainder carries over to the next run
+    assert (now - account.last_interest_payment).total_seconds() == pytest.approx(43200, abs=60)
+    assert monitor.calculate_daily_interest("p7") == 0.0
+
+def reference_rebalance(account, action, index_names):
+    """The original one-account rebalance loop."""
+    balance = account.balance
+    if action == "divest":
+        for name in account.investment_pots:
+            if name in index_names:
+                balance += balance * account.investment_pots[name] * 0.5
+    elif action == "invest":
+        available = balance * (1 - account.safety_threshold)
+        for name, allocation in account.investment_pots.items():
+            if name in index_names:
+                balance -= available * allocation
+    return balance
+
+@pytest.mark.parametrize("action", ["invest", "divest", "hold"])
+def test_bulk_rebalance_matches_per_account_loop(action):
+    monitor = FishHealthMonitor()
+    rng = np.random.default_rng(8)
+    before = {}
+    for i in range(2000):
+        account = monitor.create_savings_account(f"p{i}").copy(update={
+            "balance": float(rng.uniform(0, 5000)),
+            "safety_threshold": float(rng.uniform(0, 0.5)),
+            "auto_reinvest": bool(i % 3),
+            "investment_pots": {"sustainable_fisheries": 0.4, "unknown_pot": 0.2, "conservation_focus": 0.1}
+        })
+        monitor.import_savings_accounts([(f"p{i}", account)])
+        before[f"p{i}"] = account
+    snapshot = monitor.update_market_metrics().copy(update={"recommended_action": action})
+
+    report = monitor.rebalance_all_portfolios(snapshot)
+
+    for profile_id, account in before.items():
+        expected = (reference_rebalance(account, action, monitor.investment_indices)
+                    if account.auto_reinvest else account.balance)
+        assert monitor.get_savings_account(profile_id).balance == pytest.approx(expected)
+    assert report["action"] == action
+    assert report["accounts_rebalanced"] == (0 if action == "hold" else 1333)
+    assert report["by_pot"]["local_food_security"] == 0.0
+
+def test_projections_follow_history_and_share_allocations():
+    monitor = FishHealthMonitor()
+    monitor.projector.seed = 1
+    rng = np.random.default_rng(5)
+    for returns in rng.normal(0.001, 0.01, (200, 3)):
+        for name, value in zip(monitor.investment_indices, returns):
+            monitor.update_index_performance(name, value)
+    for i in range(300):
+        account = monitor.create_savings_account(f"p{i}").copy(update={"balance": 1000.0 * (i + 1)})
+        if i % 2:
+            account = account.copy(update={"investment_pots": {"sustainable_fisheries": 1.0}})
+        monitor.import_savings_accounts([(f"p{i}", account)])
+
+    projections = monitor.project_all_savings(horizon_days=100)
+
+    # Two distinct allocations, so two cached projections
+    assert len(monitor.projection_cache) == 2
+    fully_invested = projections["expected_balance"][1] / 2000.0
+    mean_log_return = np.log1p(monitor.index_performance["sustainable_fisheries"].arrays()[1]).mean()
+    assert fully_invested == pytest.approx(np.exp(100 * mean_log_return), rel=0.02)
+    low, median, high = projections["balance_percentiles"][1][[0, 2, 4]]
+    assert low < median < high
+
+    single = monitor.project_savings("p1", horizon_days=100)
+    assert single["expected_balance"] == pytest.approx(projections["expected_balance"][1])
+
+    monitor.update_index_performance("sustainable_fisheries", 0.05)
+    monitor.project_savings("p1", horizon_days=100)
+    assert len(monitor.projection_cache) == 1
+
+def test_projection_horizon_is_validated_and_caches_are_bounded(monkeypatch):
+    from fastapi.testclient import TestClient
+    import fish_health_monitor
+
+    monitor = FishHealthMonitor(projection_cache_size=2)
+    monitor.projector.paths = 100
+    monitor.projector.max_horizons = 2
+    monkeypatch.setattr(fish_health_monitor, "monitor", monitor)
+    client = TestClient(fish_health_monitor.router)
+    monitor.import_savings_accounts([("p1", monitor.create_savings_account("p1").copy(update={"balance": 100.0}))])
+
+    assert client.get("/savings/p1/projection", params={"horizon_days": 0}).status_code == 422
+    assert client.get("/savings/p1/projection",
+                      params={"horizon_days": fish_health_monitor.MAX_PROJECTION_DAYS + 1}).status_code == 422
+    for horizon in (10, 20, 30, 40):
+        assert client.get("/savings/p1/projection", params={"horizon_days": horizon}).status_code == 200
+
+    assert len(monitor.projection_cache) == 2
+    assert list(monitor.projector._growth) == [30, 40]
+    with pytest.raises(ValueError):
+        monitor.projector.growth(0)
+
+def test_leaderboard_responses_are_cached_with_etags(monkeypatch):
+    from fastapi.testclient import TestClient
+    import fish_health_monitor
+
+    monitor = FishHealthMonitor()
+    monkeypatch.setattr(fish_health_monitor, "monitor", monitor)
+    client = TestClient(fish_health_monitor.router)
+    monitor.update_community_impact("a", {"name": "A", "location": {"lat": 35.0, "lon": -120.0}})
+
+    first = client.get("/leaderboard/global")
+    etag = first.headers["etag"]
+    assert [e["profile_id"] for e in first.json()] == ["a"]
+    assert client.get("/leaderboard/global", headers={"If-None-Match": etag}).status_code == 304
+
+    # Nearby points snap to the same geohash cell and share one cached board
+    client.get("/leaderboard/local", params={"lat": 35.0001, "lon": -120.0001})
+    client.get("/leaderboard/local", params={"lat": 35.0002, "lon": -120.0002})
+    assert len([key for key in monitor.leaderboard_cache._entries if key[0] == "local"]) == 1
+
+    version = monitor.leaderboard_version
+    monitor.update_community_impact("b", {"name": "B", "sustainable_catches": 1})
+    monitor.add_friend("a", "b")
+    assert monitor.leaderboard_version > version
+
+    changed = client.get("/leaderboard/global", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [e["profile_id"] for e in client.get("/leaderboard/friends/a").json()] == ["b"]
+
+def test_local_board_snap_error_scales_with_radius(monkeypatch):
+    from fastapi.testclient import TestClient
+    import fish_health_monitor
+
+    monitor = FishHealthMonitor()
+    monkeypatch.setattr(fish_health_monitor, "monitor", monitor)
+    client = TestClient(fish_health_monitor.router)
+    # About 945m north of the query point
+    monitor.update_community_impact("near", {"name": "Near", "location": {"lat": 35.0085, "lon": -120.0}})
+
+    board = client.get("/leaderboard/local", params={"lat": 35.0, "lon": -120.0, "radius_km": 1}).json()
+    assert [e["profile_id"] for e in board] == ["near"]
+    assert board[0]["distance"] == pytest.approx(0.945, abs=0.02)
+
+    small, _ = monitor.local_leaderboard_cell(35.0, -120.0, 1)
+    large, _ = monitor.local_leaderboard_cell(35.0, -120.0, 500)
+    assert len(small) > len(large)
@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime, timedelta
+from monitor_storage import LRUCache, MonitorStorage, SQLiteStorage
+from fish_health_monitor import FishHealthMonitor
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def test_sqlite_state_survives_restart(tmp_path):
+    path = str(tmp_path / "monitor.db")
+    monitor = FishHealthMonitor(storage=SQLiteStorage(path), impact_cache_size=2)
+    for i in range(5):
+        monitor.update_community_impact(f"p{i}", {
+            "name": f"P{i}",
+            "location": {"lat": 35.0 + i, "lon": -120.0},
+            "sustainable_catches": i
+        })
+        monitor.create_savings_account(f"p{i}")
+    monitor.import_friends([("p0", "p1"), ("p1", "p2")])
+    monitor.update_savings_settings("p3", 0.5, False, {"conservation_focus": 1.0})
+    monitor.storage.close()
+
+    restored = FishHealthMonitor(storage=SQLiteStorage(path))
+
+    assert [e.profile_id for e in restored.get_global_leaderboard()] == ["p4", "p3", "p2", "p1", "p0"]
+    assert [e.profile_id for e in restored.get_friends_of_friends_leaderboard("p0")] == ["p2"]
+    assert sorted(restored.community_impacts["p1"].friends) == ["p0", "p2"]
+    account = restored.get_savings_account("p3")
+    assert account.auto_reinvest is False
+    assert account.investment_pots == {"conservation_focus": 1.0}
+    assert [e.profile_id for e in restored.get_local_leaderboard({"lat": 37.0, "lon": -120.0}, radius_km=120)] == \
+        ["p3", "p2", "p1"]
+
+def test_sqlite_streams_rows_in_batches(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "monitor.db"), fetch_size=2)
+    storage.upsert_community_impacts((f"p{i}", "{}") for i in range(5))
+
+    impacts = storage.load_community_impacts()
+    assert next(impacts) == ("p0", "{}", 1)
+    # The lock is released between batches, so writes can interleave with a stream
+    storage.add_friend_links([("p0", "p1")])
+    assert [profile_id for profile_id, _, _ in impacts] == ["p1", "p2", "p3", "p4"]
+
+def test_monitor_storage_is_abstract():
+    with pytest.raises(TypeError):
+        MonitorStorage()
+
+def test_sqlite_uses_wal_and_bulk_upserts(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "monitor.db"))
+    assert storage.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    monitor = FishHealthMonitor(storage=storage)
+    monitor.import_savings_accounts(
+        (f"p{i}", monitor.create_savings_account(f"p{i}").copy(update={"balance": 100.0})) for i in range(1000)
+    )
+    monitor.rebalance_all_portfolios(monitor.update_market_metrics().copy(update={"recommended_action": "invest"}))
+
+    stored = {account["profile_id"]: account for account in storage.load_savings_accounts()}
+    assert len(stored) == 1000
+    assert stored["p999"]["balance"] == pytest.approx(monitor.get_savings_account("p999").balance)
+    assert stored["p999"]["balance"] < 100.0
+
+def test_workers_sharing_a_database_build_on_each_other(tmp_path):
+    path = str(tmp_path / "monitor.db")
+    worker_a = FishHealthMonitor(storage=SQLiteStorage(path))
+    worker_b = FishHealthMonitor(storage=SQLiteStorage(path))
+    worker_a.import_savings_accounts([("p1", worker_a.create_savings_account("p1").copy(update={
+        "balance": 1000.0, "last_interest_payment": datetime.now() - timedelta(days=10)
+    }))])
+    worker_b.get_savings_account("p1")
+
+    paid = worker_a.accrue_all_interest()["total_interest"]
+    worker_b.update_savings_settings("p1", 0.5, False, {"conservation_focus": 1.0})
+    worker_a.update_community_impact("a", {"name": "A", "sustainable_catches": 3})
+
+    assert paid > 0
+    assert [e.profile_id for e in worker_b.get_global_leaderboard()] == ["a"]
+    assert worker_b.get_savings_account("p1").balance == pytest.approx(1000.0 + paid)
+    worker_a.storage.close()
+    worker_b.storage.close()
+
+    restored = FishHealthMonitor(storage=SQLiteStorage(path)).get_savings_account("p1")
+    assert restored.balance == pytest.approx(1000.0 + paid)
+    assert restored.investment_pots == {"conservation_focus": 1.0}
@@ -0,0 +1,47 @@
+import pytest
+import json
+from sim_engine import SimulationEngine
+from uav_simulator import UAVSimulator, SimClock
+
+def test_reads_do_not_step_the_simulation():
+    uav = UAVSimulator(clock=SimClock(), seed=2)
+    engine = SimulationEngine()
+    engine.add_step(uav.update_status)
+    engine.add_view("uav_status", uav.get_status)
+
+    engine.tick()
+    first = engine.snapshot("uav_status")
+    for _ in range(10):
+        assert engine.snapshot("uav_status") is first
+
+    assert json.loads(first.body)["battery_level"] == pytest.approx(0.999)
+    assert uav.status.battery_level == pytest.approx(0.999)
+
+def test_publish_swaps_in_new_snapshot():
+    uav = UAVSimulator(clock=SimClock(), seed=2)
+    engine = SimulationEngine()
+    engine.add_view("uav_status", uav.get_status)
+    before = engine.snapshot("uav_status")
+
+    uav.status.battery_level = 0.5
+    engine.publish("uav_status")
+
+    assert json.loads(before.body)["battery_level"] == 1.0
+    assert json.loads(engine.snapshot("uav_status").body)["battery_level"] == 0.5
+
+def test_failing_step_does_not_freeze_snapshots():
+    uav = UAVSimulator(clock=SimClock(), seed=2)
+    engine = SimulationEngine()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    engine.add_step(broken)
+    engine.add_step(uav.update_status)
+    engine.add_view("uav_status", uav.get_status)
+
+    engine.tick()
+    engine.tick()
+
+    assert engine.snapshot("uav_status").sequence == 2
+    assert json.loads(engine.snapshot("uav_status").body)["battery_level"] == pytest.approx(0.998)
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+# Startup benchmark for fish_health_monitor: a fresh interpreter imports the
+# module and serves one request straight through the ASGI app. Budgets can be
+# loosened on slow machines with the environment variables below.
+IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET", "1.0"))
+FIRST_REQUEST_BUDGET_SECONDS = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET", "0.5"))
+LAZY_MODULES = ["aiohttp", "geopy", "geopandas", "pandas", "requests"]
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server")
+
+STARTUP_SCRIPT = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import fish_health_monitor
+imported = time.perf_counter()
+
+async def first_request():
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await fish_health_monitor.router({
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/investment-indices", "raw_path": b"/investment-indices", "root_path": "",
+        "query_string": b"", "headers": [], "server": ("test", 80), "client": ("test", 1)
+    }, receive, send)
+    return sent[0]["status"]
+
+status = asyncio.run(first_request())
+served = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_request_seconds": served - imported,
+    "status": status,
+    "loaded": [name for name in %r if name in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+def measure_startup():
+    env = {**os.environ, "PYTHONPATH": SERVER_DIR}
+    env.pop("FISH_MONITOR_DB", None)
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def test_startup_within_budget():
+    # Best of three runs, to ride out noise from a busy machine
+    runs = [measure_startup() for _ in range(3)]
+    best_import = min(run["import_seconds"] for run in runs)
+    best_first_request = min(run["first_request_seconds"] for run in runs)
+
+    assert runs[0]["status"] == 200
+    assert runs[0]["loaded"] == [], "heavy dependencies should load on first use"
+    assert best_import < IMPORT_BUDGET_SECONDS, f"import took {best_import:.3f}s"
+    assert best_first_request < FIRST_REQUEST_BUDGET_SECONDS, f"first request took {best_first_request:.3f}s"
@@ -0,0 +1,34 @@
+import pytest
+import numpy as np
+from timeseries import TimeSeries
+
+def test_rolling_stats_match_window_after_wraparound():
+    series = TimeSeries(raw_capacity=100)
+    rng = np.random.default_rng(4)
+    values = rng.normal(0.01, 0.05, 1234) + np.linspace(0, 1, 1234)
+    for i, value in enumerate(values):
+        series.append(value, timestamp=1000.0 + i)
+
+    window = values[-100:]
+    times, stored = series.arrays()
+    assert len(series) == 100
+    assert np.array_equal(stored, window)
+    assert times[0] == 1000.0 + 1134
+    assert series.mean == pytest.approx(window.mean())
+    assert series.volatility == pytest.approx(window.std())
+    assert series.slope == pytest.approx(np.polyfit(np.arange(100), window, 1)[0])
+    assert series.last() == values[-1]
+
+def test_tiers_downsample_to_bucket_means():
+    series = TimeSeries(raw_capacity=10, tiers=[("minute", 60, 3), ("hour", 3600, 10)])
+    for second in range(0, 300, 10):
+        series.append(float(second), timestamp=float(second))
+
+    times, means = series.arrays("minute")
+    # Five minutes of samples; only the last three closed buckets are kept plus the open one
+    assert times.tolist() == [60.0, 120.0, 180.0, 240.0]
+    assert means.tolist() == [85.0, 145.0, 205.0, 265.0]
+    assert series.arrays("hour")[1].tolist() == [145.0]
+    assert len(series.records("return", tier="minute", limit=2)) == 2
+    with pytest.raises(ValueError):
+        series.arrays("week")
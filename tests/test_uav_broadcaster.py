@@ -0,0 +1,121 @@
+import pytest
+import json
+from detection_tracker import DetectionTracker
+from uav_broadcaster import UAVBroadcaster
+from uav_simulator import UAVSimulator, SimClock
+from telemetry_codec import decode_frame
+
+def make_broadcaster(queue_size=8):
+    uav = UAVSimulator(clock=SimClock(), seed=1)
+    return UAVBroadcaster(
+        uav,
+        DetectionTracker(),
+        serialize_fish=lambda fish: {"id": fish.id},
+        serialize_event=lambda event: {"event": event.type, "id": event.fish_id},
+        queue_size=queue_size
+    )
+
+def step(broadcaster):
+    # Same step order as the app's SimulationEngine
+    broadcaster.uav.update_status()
+    broadcaster.uav.scan()
+    broadcaster.publish()
+
+def test_one_tick_per_period_for_all_subscribers():
+    broadcaster = make_broadcaster()
+    queues = [broadcaster.subscribe("full") for _ in range(50)] + [broadcaster.subscribe("delta")]
+
+    step(broadcaster)
+
+    assert broadcaster.uav.status.battery_level == pytest.approx(0.999)
+    full_frames = {queues[i].get_nowait() for i in range(50)}
+    assert len(full_frames) == 1
+    assert "detected_fish" in json.loads(full_frames.pop())
+    assert "detection_events" in json.loads(queues[-1].get_nowait())
+
+def test_slow_subscriber_drops_oldest_frames():
+    broadcaster = make_broadcaster(queue_size=2)
+    slow = broadcaster.subscribe("full")
+
+    for _ in range(5):
+        step(broadcaster)
+
+    assert slow.qsize() == 2
+    assert broadcaster.dropped_frames == 3
+    battery = [json.loads(slow.get_nowait())["status"]["battery_level"] for _ in range(2)]
+    assert battery == pytest.approx([0.996, 0.995])
+
+def test_unsubscribed_queue_gets_no_frames():
+    broadcaster = make_broadcaster()
+    queue = broadcaster.subscribe("full")
+    broadcaster.unsubscribe(queue)
+
+    step(broadcaster)
+
+    assert queue.empty()
+    assert broadcaster.tracker.population is None
+
+def test_rest_reads_do_not_starve_subscribers():
+    broadcaster = make_broadcaster()
+    uav = broadcaster.uav
+    uav.fish_population.lat[:] = 0.0
+    uav.fish_population.lon[:] = 0.0
+    delta = broadcaster.subscribe("delta")
+
+    events = 0
+    for _ in range(12):
+        uav.query_fish(limit=10)
+        step(broadcaster)
+        uav.query_fish(limit=10)
+        events += len(json.loads(delta.get_nowait())["detection_events"])
+
+    assert events >= 50
+
+def test_binary_subscribers_get_keyframe_then_deltas():
+    broadcaster = make_broadcaster()
+    broadcaster.uav.fish_population.lat[:] = 0.0
+    broadcaster.uav.fish_population.lon[:] = 0.0
+    binary = broadcaster.subscribe("binary")
+
+    step(broadcaster)
+    keyframe = decode_frame(binary.get_nowait())
+    assert keyframe["keyframe"]
+    assert keyframe["status"]["battery_level"] == pytest.approx(0.999)
+    assert len(keyframe["fish"]) == 50
+
+    step(broadcaster)
+    delta_bytes = binary.get_nowait()
+    delta = decode_frame(delta_bytes, keyframe["species_names"])
+    assert not delta["keyframe"]
+    assert delta["sequence"] == keyframe["sequence"] + 1
+    assert "lat" not in delta["status"] and "salinity" not in delta["status"]
+    assert "battery_level" in delta["status"]
+    assert len(delta_bytes) < 64
+
+def test_overflowing_binary_subscriber_is_resynced_with_keyframe():
+    broadcaster = make_broadcaster(queue_size=2)
+    binary = broadcaster.subscribe("binary")
+
+    for _ in range(4):
+        step(broadcaster)
+
+    frames = [decode_frame(binary.get_nowait()) for _ in range(binary.qsize())]
+    assert frames[0]["keyframe"]
+    assert frames[0]["sequence"] == 3
+
+def test_out_of_range_water_quality_is_encoded():
+    broadcaster = make_broadcaster()
+    binary = broadcaster.subscribe("binary")
+    quality = broadcaster.uav.status.water_quality
+    quality.ph = -0.25
+    quality.oxygen = -3.5
+    quality.salinity = 1e6
+    quality.turbidity = -1e6
+
+    broadcaster.publish()
+    status = decode_frame(binary.get_nowait())["status"]
+
+    assert status["ph"] == pytest.approx(-0.25)
+    assert status["oxygen"] == pytest.approx(-3.5)
+    assert status["salinity"] == pytest.approx(32767 / 100)
+    assert status["turbidity"] == pytest.approx(-32768 / 100)
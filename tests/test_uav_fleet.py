@@ -0,0 +1,39 @@
+import pytest
+from datetime import datetime
+from uav_fleet import UAVFleet
+from uav_simulator import Fish, FishPopulation, GPSPoint
+
+def test_fleet_step_updates_every_uav():
+    fleet = UAVFleet(size=200, fish_count=10000)
+    fleet.move("uav_7", 1.0, 1.0, 0.0)
+
+    fleet.update_status()
+
+    assert (fleet.battery_level < 1.0).all()
+    assert not fleet.is_operational[fleet.slot("uav_7")]
+    assert fleet.is_operational.sum() == 199
+
+def test_fleet_detections_come_from_shared_population():
+    fleet = UAVFleet(size=3)
+    fleet.fish_population = FishPopulation.from_fish([
+        Fish("near_0", GPSPoint(0.0001, 0.0, -2.0), "Bass", 0.5, datetime.now()),
+        Fish("near_2", GPSPoint(0.5, 0.5, -2.0), "Trout", 0.5, datetime.now()),
+    ])
+    fleet.move("uav_2", 0.5, 0.5, 0.0)
+
+    fleet.update_status()
+
+    assert [fish.id for fish in fleet.get_detected_fish("uav_0")] == ["near_0"]
+    assert [fish.id for fish in fleet.get_detected_fish("uav_2")] == ["near_2"]
+    assert fleet.get_status("uav_1")["detected_fish"] == 1
+
+def test_fleet_maintenance_restores_uav():
+    fleet = UAVFleet(size=2)
+    fleet.move("uav_1", 1.0, 1.0, 0.0)
+    fleet.update_status()
+
+    fleet.perform_maintenance("uav_1")
+
+    status = fleet.get_status("uav_1")
+    assert status["battery_level"] == 1.0
+    assert status["is_operational"] is True
@@ -1,6 +1,9 @@
 import pytest
+import math
 from datetime import datetime, timedelta
-from uav_simulator import UAVSimulator, GPSPoint, Fish, WaterQuality
+import numpy as np
+from uav_simulator import (UAVSimulator, GPSPoint, Fish, WaterQuality, FenceSet, GPSFence, PolygonFence, SimClock,
+                          SpatialGrid, StaleCursorError)
 
 def test_uav_initialization():
     uav = UAVSimulator()
@@ -96,4 +99,221 @@ def test_water_quality_bounds():
         uav.update_status()
         assert 0 <= uav.status.water_quality.ph <= 14
         assert uav.status.water_quality.temperature > 0
-        assert uav.status.water_quality.oxygen > 0 
\ No newline at end of file
+        assert uav.status.water_quality.oxygen > 0
+
+def test_large_fish_population_step():
+    uav = UAVSimulator(fish_count=100000)
+    assert len(uav.fish_population) == 100000
+    initial_lat = uav.fish_population.lat.copy()
+
+    uav.update_status()
+
+    assert (uav.fish_population.lat != initial_lat).all()
+    fish = uav.fish_population[99999]
+    assert fish.id == "fish_99999"
+    assert fish.species in uav.fish_population.species_names
+
+def test_fish_finder_scan_many_matches_linear_scan():
+    uav = UAVSimulator(fish_count=20000)
+    positions = [GPSPoint(0.0, 0.0, 0.0), GPSPoint(0.005, -0.005, 0.0), GPSPoint(1.0, 1.0, 0.0)]
+
+    results = uav.fish_finder.scan_many(positions, uav.fish_population)
+
+    population = uav.fish_population
+    for position, detected in zip(positions, results):
+        expected = [
+            population.fish_id(i) for i in range(len(population))
+            if math.hypot(population.lat[i] - position.lat, population.lon[i] - position.lon) * 111000 <= 50
+        ]
+        assert [fish.id for fish in detected] == expected
+    assert results[2] == []
+
+def test_grid_updates_incrementally_as_fish_move():
+    rng = np.random.default_rng(4)
+    uav = UAVSimulator(fish_count=20000, seed=4)
+    population = uav.fish_population
+    positions = [GPSPoint(0.0, 0.0, 0.0), GPSPoint(0.003, 0.002, 0.0)]
+    linear = population.within_range(positions[0], 50)
+
+    population.within_range_many(positions, 50)
+    assert np.array_equal(population.within_range(positions[0], 50), linear)
+    for _ in range(3):
+        population.random_walk(rng)
+        # A stale grid is not updated for a single query, only for batches
+        single = population.within_range(positions[0], 50)
+        assert population._grids[50].stale
+        fresh = SpatialGrid(population.lat, population.lon, 50)
+        for got, expected in zip(population.within_range_many(positions, 50), fresh.query_many(
+                [p.lat for p in positions], [p.lon for p in positions], 50)):
+            assert np.array_equal(got, expected)
+        assert np.array_equal(single, fresh.query(0.0, 0.0, 50))
+        assert np.array_equal(population.grid(50).sorted_keys, fresh.sorted_keys)
+
+def test_fence_set_checks_circles_and_polygons():
+    fences = FenceSet([
+        GPSFence(center=GPSPoint(0.0, 0.0, 0.0), radius_meters=1000),
+        PolygonFence([GPSPoint(1.0, 1.0, 0.0), GPSPoint(1.0, 2.0, 0.0), GPSPoint(2.0, 1.5, 0.0)]),
+    ])
+    lats = np.array([0.0, 0.005, 1.2, 1.9, 1.9])
+    lons = np.array([0.0, 0.0, 1.5, 1.5, 1.9])
+
+    inside = fences.contains_matrix(lats, lons)
+
+    assert inside.tolist() == [
+        [True, False],
+        [True, False],
+        [False, True],
+        [False, True],
+        [False, False],
+    ]
+    assert fences.contains_many(lats, lons).tolist() == [True, True, True, True, False]
+    for lat, lon, expected in zip(lats, lons, inside[:, 0]):
+        assert fences.fences[0].is_within_bounds(GPSPoint(lat, lon, 0.0)) == expected
+
+def test_sim_clock_drives_scan_interval():
+    uav = UAVSimulator(clock=SimClock(timestep_seconds=1.0), seed=7)
+    uav.get_detected_fish()
+    for _ in range(4):
+        uav.update_status()
+        assert not uav.fish_finder.can_scan()
+    uav.update_status()
+    assert uav.fish_finder.can_scan()
+
+def test_seeded_runs_are_reproducible():
+    first = UAVSimulator(fish_count=1000, clock=SimClock(timestep_seconds=1.0), seed=42)
+    second = UAVSimulator(fish_count=1000, clock=SimClock(timestep_seconds=1.0), seed=42)
+
+    first_summary = first.run(hours=0.5)
+    second_summary = second.run(hours=0.5)
+
+    assert first_summary["steps"] == 1800
+    assert first_summary["scans"] == 360
+    assert first_summary["detections"] == second_summary["detections"]
+    assert first.status.water_quality == second.status.water_quality
+    assert (first.fish_population.lat == second.fish_population.lat).all()
+
+def test_snapshot_round_trip(tmp_path):
+    uav = UAVSimulator(fish_count=5000, clock=SimClock(timestep_seconds=1.0), seed=3)
+    uav.status.position = GPSPoint(0.001, 0.002, 3.0)
+    uav.run(hours=0.01)
+    path = str(tmp_path / "scenario.snap")
+
+    uav.save_snapshot(path)
+    restored = UAVSimulator.load_snapshot(path)
+
+    assert restored.get_status() == uav.get_status()
+    assert restored.clock.now() == uav.clock.now()
+    assert (restored.fish_population.lat == uav.fish_population.lat).all()
+    assert restored.fish_population[42] == uav.fish_population[42]
+
+    # Restored state (including the RNG) continues exactly like the original
+    uav.update_status()
+    restored.update_status()
+    assert (restored.fish_population.lon == uav.fish_population.lon).all()
+    assert restored.status.water_quality == uav.status.water_quality
+
+def test_snapshot_keeps_custom_fish_ids(tmp_path):
+    uav = UAVSimulator()
+    uav.fish_population = [
+        Fish("nemo", GPSPoint(0.0, 0.0, -1.0), "Clownfish", 0.1, datetime.now())
+    ]
+    path = str(tmp_path / "custom.snap")
+
+    uav.save_snapshot(path)
+    restored = UAVSimulator.load_snapshot(path, mmap_mode=None)
+
+    assert [fish.id for fish in restored.fish_population] == ["nemo"]
+    assert restored.fish_population[0].species == "Clownfish"
+
+def test_population_query_filters_and_pages():
+    uav = UAVSimulator(fish_count=20000, seed=5)
+    population = uav.fish_population
+    bbox = (-0.002, 0.004, 0.001, 0.006)
+
+    pages = []
+    cursor = None
+    while True:
+        rows, cursor = population.query(bbox=bbox, species=["Bass", "Salmon"], min_size=0.5,
+                                        after=cursor, limit=100)
+        pages.append(rows)
+        if cursor is None:
+            break
+
+    expected = np.flatnonzero(
+        (population.lat >= bbox[0]) & (population.lat <= bbox[1]) &
+        (population.lon >= bbox[2]) & (population.lon <= bbox[3]) &
+        np.isin(population.species_code, [0, 2]) & (population.size >= 0.5)
+    )
+    assert len(pages) > 1
+    assert np.array_equal(np.concatenate(pages), expected)
+
+def test_query_fish_pages_over_one_scan():
+    uav = UAVSimulator(fish_count=200, seed=5)
+    uav.fish_population.lat[:] = 0.0
+    uav.fish_population.lon[:] = 0.0
+
+    uav.scan()
+    scan_id = uav.scan_id
+    first, cursor = uav.query_fish(limit=150)
+    uav.update_status()
+    rest, last_cursor = uav.query_fish(after=cursor, limit=150)
+
+    assert len(first) == 150 and len(rest) == 50
+    # Reads never scan, so they cannot use up the fish finder's interval
+    assert uav.scan_id == scan_id
+    assert last_cursor is None
+
+def test_query_fish_rejects_cursor_from_older_scan():
+    uav = UAVSimulator(fish_count=200, seed=5, clock=SimClock(datetime(2024, 1, 1)))
+    uav.fish_population.lat[:] = 0.0
+    uav.fish_population.lon[:] = 0.0
+
+    uav.scan()
+    first, cursor = uav.query_fish(limit=150)
+    for _ in range(uav.fish_finder.scan_interval):
+        uav.clock.tick()
+    assert uav.scan() is not None
+
+    with pytest.raises(StaleCursorError):
+        uav.query_fish(after=cursor, limit=150)
+    with pytest.raises(ValueError):
+        uav.query_fish(after="150", limit=150)
+
+    population, population_cursor = uav.query_fish(detected_only=False, limit=150)
+    rest, _ = uav.query_fish(detected_only=False, after=population_cursor, limit=150)
+    assert len(population) == 150 and len(rest) == 50
+
+def test_fence_batch_matches_scalar_at_high_latitude_and_antimeridian():
+    rng = np.random.default_rng(9)
+    fences = [
+        GPSFence(center=GPSPoint(80.0, 0.0, 0.0), radius_meters=500000),
+        GPSFence(center=GPSPoint(-60.0, 179.5, 0.0), radius_meters=200000),
+        GPSFence(center=GPSPoint(88.0, 90.0, 0.0), radius_meters=300000),
+    ]
+    for fence, (lat_range, lon_range) in zip(fences, [((70, 90), (-60, 60)), ((-63, -57), (170, 190)),
+                                                      ((83, 90), (-180, 180))]):
+        lats = rng.uniform(*lat_range, 20000)
+        lons = (rng.uniform(*lon_range, 20000) + 180) % 360 - 180
+        batch = fence.contains_many(lats, lons)
+        scalar = [fence.is_within_bounds(GPSPoint(lat, lon, 0.0)) for lat, lon in zip(lats, lons)]
+        assert batch.tolist() == scalar
+        assert batch.any()
+
+def test_polygon_fence_across_antimeridian():
+    fence = PolygonFence([GPSPoint(-1.0, 179.0, 0.0), GPSPoint(-1.0, -179.0, 0.0),
+                          GPSPoint(1.0, -179.0, 0.0), GPSPoint(1.0, 179.0, 0.0)])
+    lats = np.array([0.0, 0.0, 0.0, 0.0])
+    lons = np.array([179.5, -179.5, 180.0, 0.0])
+
+    assert fence.contains_many(lats, lons).tolist() == [True, True, True, False]
+
+def test_population_indexing_matches_a_list():
+    uav = UAVSimulator(fish_count=5, seed=2)
+    fish = list(uav.fish_population)
+
+    assert uav.fish_population[-1] == fish[-1]
+    assert uav.fish_population[1:3] == fish[1:3]
+    with pytest.raises(IndexError):
+        uav.fish_population[5]
+    with pytest.raises(IndexError):
+        uav.fish_population[-6]